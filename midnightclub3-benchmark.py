@@ -0,0 +1,287 @@
+import os
+import sys
+import json
+import time
+import random
+import struct
+import argparse
+import platform
+import tempfile
+import subprocess
+import importlib.util
+from datetime import datetime, timezone
+
+import numpy as np
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+def carregar_ferramenta():
+    # O nome do script tem hífens, então ele é carregado pelo caminho
+    caminho = os.path.join(DIRETORIO, "midnightclub3-mesh-tool.py")
+    spec = importlib.util.spec_from_file_location("midnightclub3_mesh_tool", caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+# ---------------------------
+# Gerador de packs sintéticos
+# ---------------------------
+def gerar_pack_sintetico(caminho, grupos=8, entradas=16, strips=40, seed=0, base=0x00100000):
+    # Escreve um pack com o layout que processar_arquivo espera. Os ponteiros são
+    # "virtuais" (posição no arquivo + base); o OFFSET do cabeçalho é base + 0x80.
+    # PCK_AMOUNT e group_amount ocupam um byte cada no formato.
+    if not 0 <= grupos <= 0xFF:
+        raise ValueError(f"grupos demais: {grupos} (PCK_AMOUNT tem 8 bits, máximo 255)")
+    if not 0 <= entradas <= 0xFF:
+        raise ValueError(f"mesh entries demais por grupo: {entradas} (group_amount tem 8 bits, máximo 255)")
+    rnd = random.Random(seed)
+    buf = bytearray(0x200)
+
+    def alinhar():
+        buf.extend(bytes(-len(buf) % 0x10))
+
+    def ptr(pos):
+        return pos + base
+
+    struct.pack_into('<I', buf, 0, base + 0x80)
+
+    enderecos_nomes = []
+    for g in range(grupos):
+        enderecos_nomes.append(len(buf))
+        buf.extend(f"synthetic_group_{g:04d}".encode('ascii') + b'\x00')
+    alinhar()
+
+    enderecos_grupos = []
+    for g in range(grupos):
+        enderecos_entradas = []
+        for _ in range(entradas):
+            alinhar()
+            mesh_start = len(buf)
+            total_vtx = 0
+            for s in range(strips):
+                n = rnd.randint(3, 0x2A)
+                total_vtx += n
+                # Strips pares usam só o padrão 1, ímpares também o padrão 2
+                for tag in ((b'\xEE\x00',) if s % 2 == 0 else (b'\xEE\x00', b'\x1B\x02')):
+                    buf.extend(tag + bytes([n, 0x69]))
+                    buf.extend(np.array([rnd.randint(-0x4000, 0x4000) for _ in range(n * 3)],
+                                        dtype='<i2').tobytes())
+                buf.extend(b'\xC4\x00' + bytes([n, 0x65]))
+                buf.extend(np.array([rnd.randint(0, 0x1000) for _ in range(n * 2)], dtype='<i2').tobytes())
+                buf.extend(b'\x9A\x00' + bytes([n, 0x6A]) + bytes(6))
+                for _ in range(n - 2):
+                    buf.extend(bytes([1 if rnd.random() < 0.1 else 0, 0, 0]))
+            alinhar()
+            mesh_size = len(buf) - mesh_start
+            if mesh_size // 0x10 > 0xFFFF:
+                raise ValueError("strips demais por mesh entry: mesh_size não cabe em 16 bits")
+            enderecos_entradas.append(len(buf))
+            buf.extend(struct.pack('<IHH', ptr(mesh_start), mesh_size // 0x10, min(total_vtx, 0xFFFF)))
+        alinhar()
+        group_pointer = len(buf)
+        for endereco in enderecos_entradas:
+            buf.extend(struct.pack('<II', ptr(endereco), 0))
+        alinhar()
+        enderecos_grupos.append(len(buf))
+        buf.extend(bytes([0x98, 0x0F, 0x7A, 0x00]) + bytes(4) + bytes([entradas]) + bytes(7)
+                   + struct.pack('<I', ptr(group_pointer)) + bytes(12))
+
+    alinhar()
+    pck_mesh_list = len(buf)
+    for endereco in enderecos_grupos:
+        buf.extend(struct.pack('<I', ptr(endereco)))
+    pck_name_list = len(buf)
+    for endereco in enderecos_nomes:
+        buf.extend(struct.pack('<I', ptr(endereco)))
+    alinhar()
+    pck_list = len(buf)
+    buf.extend(bytes([0, 0, grupos, 0]) + bytes([0xF0, 0x0E, 0x7A, 0x00])
+               + struct.pack('<II', ptr(pck_mesh_list), ptr(pck_name_list)))
+    alinhar()
+    grouplist = len(buf)
+    buf.extend(bytes([0x20, 0x94, 0x7A, 0x00]) + bytes(12) + struct.pack('<I', ptr(pck_list)) + bytes(12))
+    struct.pack_into('<I', buf, 0x1A8, ptr(grouplist))
+
+    with open(caminho, 'wb') as f:
+        f.write(buf)
+    return len(buf)
+
+# ---------------------------
+# Medições
+# ---------------------------
+def medir(funcao, repeticoes):
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {'min_s': min(tempos), 'mediana_s': float(np.median(tempos)), 'repeticoes': repeticoes}, resultado
+
+def taxa(quantidade, segundos):
+    return quantidade / segundos if segundos > 0 else float('inf')
+
+def executar_benchmarks(ferramenta, caminho_pack, repeticoes):
+    resultados = {}
+    tamanho_pack = os.path.getsize(caminho_pack)
+
+    with ferramenta.LeitorPack(caminho_pack) as leitor:
+        tempo, cabecalho = medir(lambda: ferramenta.processar_arquivo(leitor), repeticoes)
+        offset, pck_index = cabecalho[0], cabecalho[10]
+        resultados['cabecalho'] = dict(tempo, grupos=len(pck_index))
+
+        def ler_tabelas():
+            entradas = []
+            for addr in pck_index:
+                _, group_amount, group_pointer = ferramenta.processar_grupo(leitor, addr, offset)
+                meshgroup = ferramenta.processar_meshgroup(leitor, group_pointer, group_amount, offset)
+                entradas.extend(ferramenta.processar_mesh_entries(leitor, meshgroup, offset))
+            return entradas
+        tempo, entradas = medir(ler_tabelas, repeticoes)
+        resultados['tabelas_grupos'] = dict(tempo, mesh_entries=len(entradas))
+
+        bytes_mesh = sum(e['mesh_size'] for e in entradas)
+        tempo, dados = medir(lambda: [ferramenta.processar_mesh_data(leitor, e['mesh_start'], e['mesh_end'], offset)
+                                      for e in entradas], repeticoes)
+        strips = [s for d in dados for s in ferramenta.strips_de_dados(d)]
+        vertices = sum(len(s.vertices) for s in strips)
+        resultados['processar_mesh_data'] = dict(
+            tempo, bytes=bytes_mesh, strips=len(strips), vertices=vertices,
+            mb_por_s=taxa(bytes_mesh / 1e6, tempo['min_s']),
+            vertices_por_s=taxa(vertices, tempo['min_s']))
+
+        tempo, faces = medir(lambda: [s.faces() for s in strips], repeticoes)
+        total_faces = sum(len(f) for f in faces)
+        resultados['faces'] = dict(tempo, faces=total_faces, faces_por_s=taxa(total_faces, tempo['min_s']),
+                                   vertices_por_s=taxa(vertices, tempo['min_s']))
+
+        cena = ferramenta.montar_global(leitor, entradas, offset, dados_entradas=dados)
+        v, u, f = cena.vertices, cena.uvs, cena.faces
+        with tempfile.TemporaryDirectory() as temporario:
+            destino = os.path.join(temporario, "bench.obj")
+            tempo, _ = medir(lambda: ferramenta.escrever_obj(destino, v, f, u),
+                             repeticoes)
+            bytes_obj = os.path.getsize(destino)
+        resultados['escrita_obj'] = dict(tempo, bytes=bytes_obj, vertices=len(v), faces=len(f),
+                                         mb_por_s=taxa(bytes_obj / 1e6, tempo['min_s']),
+                                         vertices_por_s=taxa(len(v), tempo['min_s']))
+
+        tempo, _ = medir(lambda: ferramenta.normais_area(v, f), repeticoes)
+        resultados['normais'] = dict(tempo, vertices=len(v), faces=len(f),
+                                     vertices_por_s=taxa(len(v), tempo['min_s']))
+
+        # Célula de 1/64 da maior extensão da cena, uma prévia típica
+        celula = float(np.ptp(v, axis=0).max()) / 64 or 1.0
+        tempo, simplificada = medir(lambda: cena.simplificar(celula), repeticoes)
+        resultados['simplificacao'] = dict(tempo, vertices=len(v), vertices_lod=len(simplificada.vertices),
+                                           faces_lod=len(simplificada.faces),
+                                           vertices_por_s=taxa(len(v), tempo['min_s']))
+
+    resultados['pack'] = {'bytes': tamanho_pack}
+    return resultados
+
+# ---------------------------
+# Inicialização: tempo até o fim de cada modo em um processo novo e quais
+# módulos pesados foram carregados
+# ---------------------------
+MODULOS_PESADOS = ("pyvista", "vtk", "vtkmodules", "pyvistaqt", "colorama")
+
+CODIGO_INICIALIZACAO = """
+import sys, json, runpy
+destino, ferramenta, modo = sys.argv[1:4]
+sys.argv = [ferramenta] + sys.argv[4:]
+try:
+    runpy.run_path(ferramenta, run_name="__main__" if modo != "importacao" else "benchmark")
+except SystemExit:
+    pass
+with open(destino, "w") as f:
+    json.dump(sorted(m for m in %r if m in sys.modules), f)
+""" % (MODULOS_PESADOS,)
+
+def medir_inicializacao(caminho_pack, repeticoes):
+    ferramenta = os.path.join(DIRETORIO, "midnightclub3-mesh-tool.py")
+    resultados = {}
+    with tempfile.TemporaryDirectory() as temporario:
+        destino = os.path.join(temporario, "modulos.json")
+        modos = {
+            'importacao': [],
+            'listar': [caminho_pack, "--listar"],
+            'exportacao': [caminho_pack, "--grupos", "1", "--saida", temporario],
+        }
+        for modo, argumentos in modos.items():
+            comando = [sys.executable, "-c", CODIGO_INICIALIZACAO, destino, ferramenta, modo] + argumentos
+            tempo, _ = medir(lambda: subprocess.run(comando, stdout=subprocess.DEVNULL, check=True), repeticoes)
+            with open(destino) as f:
+                carregados = json.load(f)
+            resultados[f'inicializacao_{modo}'] = dict(tempo, carregados=carregados)
+    return resultados
+
+def comparar(atual, anterior):
+    print(f"{'etapa':<26}{'anterior (s)':>14}{'atual (s)':>12}{'variação':>10}")
+    for etapa, dados in atual['resultados'].items():
+        antes = anterior.get('resultados', {}).get(etapa, {})
+        if 'min_s' not in dados or 'min_s' not in antes:
+            continue
+        variacao = (dados['min_s'] / antes['min_s'] - 1) * 100 if antes['min_s'] else float('nan')
+        print(f"{etapa:<26}{antes['min_s']:>14.4f}{dados['min_s']:>12.4f}{variacao:>+9.1f}%")
+
+def imprimir(resultados):
+    for etapa, dados in resultados.items():
+        if 'min_s' not in dados:
+            continue
+        extras = ", ".join(f"{k}={v:,.0f}" for k, v in dados.items()
+                           if k.endswith('_por_s') and v != float('inf'))
+        if 'carregados' in dados:
+            extras = "carregados: " + (", ".join(dados['carregados']) or "nenhum")
+        print(f"{etapa:<26}{dados['min_s']:>10.4f} s  {extras}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas de parsing e exportação.")
+    parser.add_argument("--pack", help="usa um pack existente em vez de gerar um sintético")
+    parser.add_argument("--grupos", type=int, default=8)
+    parser.add_argument("--entradas", type=int, default=16, help="mesh entries por grupo")
+    parser.add_argument("--strips", type=int, default=40, help="strips por mesh entry")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", default="benchmark.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", metavar="JSON", help="resultado anterior para comparação")
+    parser.add_argument("--sem-inicializacao", action="store_true",
+                        help="não mede a inicialização em processos novos")
+    args = parser.parse_args(argv)
+
+    ferramenta = carregar_ferramenta()
+    with tempfile.TemporaryDirectory() as temporario:
+        caminho_pack = args.pack
+        parametros = {'pack': args.pack}
+        if caminho_pack is None:
+            caminho_pack = os.path.join(temporario, "synthetic.pack")
+            try:
+                gerar_pack_sintetico(caminho_pack, args.grupos, args.entradas, args.strips, args.seed)
+            except ValueError as e:
+                parser.error(str(e))
+            parametros = {'grupos': args.grupos, 'entradas': args.entradas,
+                          'strips': args.strips, 'seed': args.seed}
+        resultados = executar_benchmarks(ferramenta, caminho_pack, args.repeticoes)
+        if not args.sem_inicializacao:
+            resultados.update(medir_inicializacao(caminho_pack, args.repeticoes))
+
+    saida = {
+        'data': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'parametros': parametros,
+        'resultados': resultados,
+    }
+    imprimir(resultados)
+    with open(args.saida, 'w') as f:
+        json.dump(saida, f, indent=2)
+    print(f"Resultados gravados em '{args.saida}'.")
+    if args.comparar:
+        with open(args.comparar) as f:
+            comparar(saida, json.load(f))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
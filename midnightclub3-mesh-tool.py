@@ -1,13 +1,210 @@
 import os
 import sys
 import re
+import mmap
+import glob
+import json
+import time
+import struct
+import functools
+import tracemalloc
+import hashlib
+import tempfile
+import uuid
+import argparse
+import csv
+import threading
+from itertools import repeat
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
-from colorama import init, Fore, Style
-import pyvista as pv
-from pyvistaqt import BackgroundPlotter  # Para visualização interativa
 
-# Inicializa o Colorama
-init(autoreset=True)
+# colorama só é importado (e inicializado) na primeira cor usada; Fore e Style
+# são representantes que repassam os atributos ao módulo real
+colorama = None
+
+def carregar_colorama():
+    global colorama
+    if colorama is None:
+        import colorama as modulo
+        # Inicializa o Colorama
+        modulo.init(autoreset=True)
+        colorama = modulo
+    return colorama
+
+class _CoresColorama:
+    def __init__(self, nome):
+        self._nome = nome
+
+    def __getattr__(self, atributo):
+        valor = getattr(getattr(carregar_colorama(), self._nome), atributo)
+        setattr(self, atributo, valor)
+        return valor
+
+Fore = _CoresColorama("Fore")
+Style = _CoresColorama("Style")
+
+# pyvista (VTK) é pesado para carregar: só é importado quando alguma etapa precisa dele
+pv = None
+
+def carregar_pyvista():
+    global pv
+    if pv is None:
+        import pyvista
+        pv = pyvista
+    return pv
+
+# ---------------------------
+# Instrumentação por etapa
+# ---------------------------
+# @instrumentado só registra a função e a devolve intacta: desligada, a
+# instrumentação não custa nada. Instrumentacao.ativar() troca as funções
+# registradas (nos globais do módulo) por versões que medem cada chamada.
+_ETAPAS_INSTRUMENTADAS = {}
+
+def instrumentado(etapa, contagens=None):
+    def decorador(funcao):
+        _ETAPAS_INSTRUMENTADAS[funcao.__name__] = (etapa, contagens)
+        return funcao
+    return decorador
+
+class Instrumentacao:
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.eventos = []
+        self._local = threading.local()
+        self._originais = {}
+        self._inicio = None
+
+    def ativar(self):
+        if self._originais:
+            return self
+        self._inicio = time.perf_counter()
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        modulo = globals()
+        for nome, (etapa, contagens) in _ETAPAS_INSTRUMENTADAS.items():
+            self._originais[nome] = modulo[nome]
+            modulo[nome] = self._envolver(modulo[nome], etapa, contagens)
+        return self
+
+    def desativar(self):
+        globals().update(self._originais)
+        self._originais.clear()
+        if self.memoria and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def __enter__(self):
+        return self.ativar()
+
+    def __exit__(self, *exc):
+        self.desativar()
+
+    @property
+    def _pilha(self):
+        # Uma pilha de etapas por thread (as gravações podem rodar em threads)
+        pilha = getattr(self._local, 'pilha', None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        return pilha
+
+    def _envolver(self, funcao, etapa, contagens):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            registro = {'etapa': etapa, 'filhos_s': 0.0, 'pico_filhos': 0, 'thread': threading.get_native_id()}
+            if self.memoria:
+                # O pico de cada etapa é isolado com reset_peak; o pico já atingido
+                # pela etapa externa é guardado antes do reset.
+                if self._pilha:
+                    pai = self._pilha[-1]
+                    pai['pico_filhos'] = max(pai['pico_filhos'], tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+            self._pilha.append(registro)
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao(*args, **kwargs)
+            finally:
+                fim = time.perf_counter()
+                self._pilha.pop()
+                registro['inicio_s'] = inicio - self._inicio
+                registro['duracao_s'] = fim - inicio
+                if self.memoria:
+                    registro['pico_memoria'] = max(registro['pico_filhos'], tracemalloc.get_traced_memory()[1])
+                if self._pilha:
+                    pai = self._pilha[-1]
+                    pai['filhos_s'] += registro['duracao_s']
+                    if self.memoria:
+                        pai['pico_filhos'] = max(pai['pico_filhos'], registro['pico_memoria'])
+                registro['profundidade'] = len(self._pilha)
+                self.eventos.append(registro)
+            if contagens is not None:
+                registro.update(contagens(args, kwargs, resultado))
+            return resultado
+        return medida
+
+    def resumo(self):
+        etapas = {}
+        for evento in self.eventos:
+            total = etapas.setdefault(evento['etapa'], {'chamadas': 0, 'tempo_s': 0.0, 'proprio_s': 0.0})
+            total['chamadas'] += 1
+            total['tempo_s'] += evento['duracao_s']
+            total['proprio_s'] += evento['duracao_s'] - evento['filhos_s']
+            for chave, valor in evento.items():
+                if chave == 'pico_memoria':
+                    total[chave] = max(total.get(chave, 0), valor)
+                elif chave not in ('etapa', 'inicio_s', 'duracao_s', 'filhos_s', 'pico_filhos', 'profundidade',
+                                   'thread'):
+                    total[chave] = total.get(chave, 0) + valor
+        return etapas
+
+    def imprimir_resumo(self):
+        print(Fore.CYAN + Style.BRIGHT + "\nPerfil por etapa:")
+        print(f"{'etapa':<22}{'chamadas':>9}{'total (s)':>11}{'próprio (s)':>13}{'MB':>9}{'pico MB':>9}  contagens")
+        for etapa, total in sorted(self.resumo().items(), key=lambda item: -item[1]['tempo_s']):
+            mb = f"{total['bytes'] / 1e6:.2f}" if 'bytes' in total else "-"
+            pico = f"{total['pico_memoria'] / 1e6:.1f}" if 'pico_memoria' in total else "-"
+            extras = ", ".join(f"{k}={v}" for k, v in total.items()
+                               if k not in ('chamadas', 'tempo_s', 'proprio_s', 'bytes', 'pico_memoria'))
+            print(f"{etapa:<22}{total['chamadas']:>9}{total['tempo_s']:>11.4f}{total['proprio_s']:>13.4f}"
+                  f"{mb:>9}{pico:>9}  {extras}")
+
+    def gravar_json(self, caminho):
+        with open(caminho, 'w') as f:
+            json.dump({'resumo': self.resumo(), 'eventos': self.eventos}, f, indent=1)
+
+    def gravar_chrome_trace(self, caminho):
+        # Formato "Trace Event" (chrome://tracing, Perfetto): eventos completos "X" em µs
+        eventos = []
+        for evento in self.eventos:
+            argumentos = {k: v for k, v in evento.items()
+                          if k not in ('etapa', 'inicio_s', 'duracao_s', 'filhos_s', 'pico_filhos', 'thread')}
+            eventos.append({'name': evento['etapa'], 'cat': 'mc3', 'ph': 'X', 'pid': os.getpid(),
+                            'tid': evento.get('thread', 0),
+                            'ts': evento['inicio_s'] * 1e6, 'dur': evento['duracao_s'] * 1e6,
+                            'args': argumentos})
+        with open(caminho, 'w') as f:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, f)
+
+def _contagens_mesh_data(args, kwargs, resultado):
+    vertices = resultado['vertices1_groups'] + resultado['vertices2_groups']
+    return {'bytes': max(args[2] - args[1], 0), 'strips': len(vertices),
+            'vertices': sum(len(g['vertices']) for g in vertices)}
+
+def _contagens_obj(args, kwargs, resultado):
+    try:
+        tamanho = os.path.getsize(args[0])
+    except OSError:
+        tamanho = 0
+    return {'bytes': tamanho, 'vertices': len(args[1]), 'faces': len(args[2])}
+
+def _contagens_glb(args, kwargs, resultado):
+    try:
+        tamanho = os.path.getsize(args[0])
+    except OSError:
+        tamanho = 0
+    return {'bytes': tamanho, 'vertices': sum(len(no[1]) for no in args[1]),
+            'faces': sum(len(no[2]) for no in args[1])}
 
 # ---------------------------
 # Funções de seleção e processamento dos ponteiros e meshes
@@ -36,29 +233,128 @@ def escolher_arquivo():
         print(Fore.RED + "Entrada inválida. Por favor, digite um número.")
         sys.exit(1)
 
-def processar_arquivo(caminho_arquivo):
+# ---------------------------
+# Leitura do arquivo: um único mmap compartilhado por todas as etapas
+# ---------------------------
+TERMINADOR_STRING = re.compile(b'[\x00\xCD]')
+# Bytes >= 0x80 viram '?' nos nomes
+TABELA_ASCII = bytes(range(0x80)) + b'?' * 0x80
+
+class LeitorPack:
+    # Abre o arquivo uma vez e expõe leituras de ponteiros via struct.unpack_from
+    # e fatias sem cópia (memoryview) sobre o mapeamento em memória.
+    def __init__(self, caminho_arquivo):
+        self.caminho = caminho_arquivo
+        self.hash = None
+        self._arquivo = open(caminho_arquivo, 'rb')
+        self.tamanho = os.fstat(self._arquivo.fileno()).st_size
+        if self.tamanho:
+            self._mm = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buf = memoryview(self._mm)
+        else:
+            # mmap não aceita arquivos vazios
+            self._mm = None
+            self._buf = memoryview(b'')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        if self._arquivo is None:
+            return
+        self._buf.release()
+        if self._mm is not None:
+            self._mm.close()
+        self._arquivo.close()
+        self._arquivo = None
+
+    def _valido(self, addr, n):
+        return addr >= 0 and addr + n <= self.tamanho
+
+    def ler(self, addr, n):
+        # Equivalente a seek+read: devolve menos bytes se passar do fim do arquivo
+        if addr < 0:
+            raise ValueError(f"endereço negativo: {addr}")
+        return bytes(self._buf[addr:addr + n])
+
+    def ler_u8(self, addr):
+        return self._buf[addr] if self._valido(addr, 1) else None
+
+    def ler_u16(self, addr):
+        return struct.unpack_from('<H', self._buf, addr)[0] if self._valido(addr, 2) else None
+
+    def ler_u32(self, addr):
+        return struct.unpack_from('<I', self._buf, addr)[0] if self._valido(addr, 4) else None
+
+    def ler_u32s(self, addr, quantidade):
+        # Até `quantidade` u32 consecutivos em um único unpack; devolve menos se
+        # a tabela passar do fim do arquivo
+        if quantidade <= 0:
+            return ()
+        if addr < 0:
+            raise ValueError(f"endereço negativo: {addr}")
+        quantidade = min(quantidade, (self.tamanho - addr) // 4)
+        return struct.unpack_from(f'<{quantidade}I', self._buf, addr) if quantidade > 0 else ()
+
+    def fatia(self, inicio, fim):
+        # View sem cópia de [inicio, fim); deve ser liberada (release) antes de fechar()
+        if inicio < 0:
+            raise ValueError(f"endereço negativo: {inicio}")
+        return self._buf[inicio:max(fim, inicio)]
+
+    def hash_conteudo(self):
+        # Hash do conteúdo inteiro do pack, calculado uma vez por leitor
+        if self.hash is None:
+            h = hashlib.blake2b(digest_size=16)
+            for inicio in range(0, self.tamanho, 1 << 24):
+                h.update(self._buf[inicio:inicio + (1 << 24)])
+            self.hash = h.hexdigest()
+        return self.hash
+
+    def ler_string(self, addr):
+        # Vai até o terminador (0x00 ou 0xCD) ou o fim do arquivo
+        if addr >= self.tamanho:
+            return ''
+        terminador = TERMINADOR_STRING.search(self._buf, addr)
+        fim = terminador.start() if terminador else self.tamanho
+        return bytes(self._buf[addr:fim]).translate(TABELA_ASCII).decode('ascii')
+
+@contextmanager
+def abrir_leitor(fonte):
+    # Aceita um caminho ou um LeitorPack já aberto (que não é fechado aqui)
+    if isinstance(fonte, LeitorPack):
+        yield fonte
+    else:
+        with LeitorPack(fonte) as leitor:
+            yield leitor
+
+def primeiros_negativos(inicio, quantidade):
+    # Quantos itens de 4 bytes de uma tabela em `inicio` caem antes do início do arquivo
+    return min(quantidade, max(0, (-inicio + 3) // 4))
+
+@instrumentado("processar_arquivo", lambda a, k, r: {'grupos': len(r[10])})
+def processar_arquivo(fonte):
     try:
-        with open(caminho_arquivo, 'rb') as f:
-            dados_offset = f.read(4)
-            if len(dados_offset) < 4:
+        with abrir_leitor(fonte) as leitor:
+            valor_offset = leitor.ler_u32(0)
+            if valor_offset is None:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para OFFSET.")
                 sys.exit(1)
-            valor_offset = int.from_bytes(dados_offset, byteorder='little')
             offset = valor_offset - 0x80
 
-            f.seek(0x1A8)
-            dados_pointer = f.read(4)
-            if len(dados_pointer) < 4:
+            valor_pointer = leitor.ler_u32(0x1A8)
+            if valor_pointer is None:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para POINTER_TO_GROUPLIST.")
                 sys.exit(1)
-            valor_pointer = int.from_bytes(dados_pointer, byteorder='little')
             pointer_to_grouplist = valor_pointer - offset
 
             if pointer_to_grouplist < 0:
                 print(Fore.RED + f"Ponteiro para GROUPLIST negativo: 0x{pointer_to_grouplist:08X}")
                 sys.exit(1)
-            f.seek(pointer_to_grouplist)
-            dados_verificacao = f.read(4)
+            dados_verificacao = leitor.ler(pointer_to_grouplist, 4)
             if len(dados_verificacao) < 4:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para verificação em POINTER_TO_GROUPLIST.")
                 sys.exit(1)
@@ -69,29 +365,24 @@ def processar_arquivo(caminho_arquivo):
             if endereco_pck < 0:
                 print(Fore.RED + f"Endereço para POINTER_TO_PCK_LIST negativo: 0x{endereco_pck:08X}")
                 sys.exit(1)
-            f.seek(endereco_pck)
-            dados_pck = f.read(4)
-            if len(dados_pck) < 4:
+            valor_pck = leitor.ler_u32(endereco_pck)
+            if valor_pck is None:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para POINTER_TO_PCK_LIST.")
                 sys.exit(1)
-            valor_pck = int.from_bytes(dados_pck, byteorder='little')
             pointer_to_pck_list = valor_pck - offset
 
             if pointer_to_pck_list + 0x02 < 0:
                 print(Fore.RED + "PCK_AMOUNT: endereço calculado é negativo.")
                 sys.exit(1)
-            f.seek(pointer_to_pck_list + 0x02)
-            dado_pck_amount = f.read(1)
-            if len(dado_pck_amount) < 1:
+            pck_amount = leitor.ler_u8(pointer_to_pck_list + 0x02)
+            if pck_amount is None:
                 print(Fore.RED + "Erro: Não foi possível ler 1 byte para PCK_AMOUNT.")
                 sys.exit(1)
-            pck_amount = int.from_bytes(dado_pck_amount, byteorder='little')
 
             if pointer_to_pck_list + 0x04 < 0:
                 print(Fore.RED + "Verificação de PCK_LIST: endereço calculado é negativo.")
                 sys.exit(1)
-            f.seek(pointer_to_pck_list + 0x04)
-            dados_verificacao_pck = f.read(4)
+            dados_verificacao_pck = leitor.ler(pointer_to_pck_list + 0x04, 4)
             if len(dados_verificacao_pck) < 4:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para verificação em POINTER_TO_PCK_LIST + 0x04.")
                 sys.exit(1)
@@ -101,72 +392,54 @@ def processar_arquivo(caminho_arquivo):
             if pointer_to_pck_list + 0x08 < 0:
                 print(Fore.RED + "PCK_MESH_LIST: endereço calculado é negativo.")
                 sys.exit(1)
-            f.seek(pointer_to_pck_list + 0x08)
-            dados_mesh = f.read(4)
-            if len(dados_mesh) < 4:
+            valor_mesh = leitor.ler_u32(pointer_to_pck_list + 0x08)
+            if valor_mesh is None:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para PCK_MESH_LIST.")
                 sys.exit(1)
-            valor_mesh = int.from_bytes(dados_mesh, byteorder='little')
             pck_mesh_list = valor_mesh - offset
 
             if pointer_to_pck_list + 0x0C < 0:
                 print(Fore.RED + "PCK_NAME_LIST: endereço calculado é negativo.")
                 sys.exit(1)
-            f.seek(pointer_to_pck_list + 0x0C)
-            dados_name = f.read(4)
-            if len(dados_name) < 4:
+            valor_name = leitor.ler_u32(pointer_to_pck_list + 0x0C)
+            if valor_name is None:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para PCK_NAME_LIST.")
                 sys.exit(1)
-            valor_name = int.from_bytes(dados_name, byteorder='little')
             pck_name_list = valor_name - offset
 
+            # As duas tabelas de ponteiros são lidas de uma vez; só os itens com
+            # endereço negativo (antes do início do arquivo) são tratados um a um
             pck_index = []
-            for i in range(pck_amount):
+            negativos = primeiros_negativos(pck_mesh_list, pck_amount)
+            for i in range(negativos):
                 addr = pck_mesh_list + i * 4
-                if addr < 0:
-                    print(Fore.RED + f"PCK_INDEX: endereço negativo na iteração {i}: 0x{addr:08X}. Pulando este item.")
-                    continue
-                f.seek(addr)
-                dado_index = f.read(4)
-                if len(dado_index) < 4:
-                    print(Fore.RED + f"Erro: O arquivo possui menos de 4 bytes para PCK_INDEX na iteração {i}.")
-                    sys.exit(1)
-                valor_index = int.from_bytes(dado_index, byteorder='little')
-                pck_index.append(valor_index - offset)
+                print(Fore.RED + f"PCK_INDEX: endereço negativo na iteração {i}: 0x{addr:08X}. Pulando este item.")
+            valores = leitor.ler_u32s(pck_mesh_list + negativos * 4, pck_amount - negativos)
+            if len(valores) < pck_amount - negativos:
+                print(Fore.RED + f"Erro: O arquivo possui menos de 4 bytes para PCK_INDEX na iteração "
+                                 f"{negativos + len(valores)}.")
+                sys.exit(1)
+            pck_index.extend(valor - offset for valor in valores)
 
             namelist_addresses = []
-            for i in range(pck_amount):
+            negativos = primeiros_negativos(pck_name_list, pck_amount)
+            for i in range(negativos):
                 addr_calc = pck_name_list + i * 4
-                if addr_calc < 0:
-                    print(Fore.RED + f"NAMELIST: endereço negativo na iteração {i}: 0x{addr_calc:08X}.")
-                    namelist_addresses.append(None)
-                else:
-                    f.seek(addr_calc)
-                    dado_name_ptr = f.read(4)
-                    if len(dado_name_ptr) < 4:
-                        print(Fore.RED + f"Erro: O arquivo possui menos de 4 bytes para NAMELIST na iteração {i}.")
-                        sys.exit(1)
-                    valor_name_ptr = int.from_bytes(dado_name_ptr, byteorder='little')
-                    namelist_addresses.append(valor_name_ptr - offset)
+                print(Fore.RED + f"NAMELIST: endereço negativo na iteração {i}: 0x{addr_calc:08X}.")
+                namelist_addresses.append(None)
+            valores = leitor.ler_u32s(pck_name_list + negativos * 4, pck_amount - negativos)
+            if len(valores) < pck_amount - negativos:
+                print(Fore.RED + f"Erro: O arquivo possui menos de 4 bytes para NAMELIST na iteração "
+                                 f"{negativos + len(valores)}.")
+                sys.exit(1)
+            namelist_addresses.extend(valor - offset for valor in valores)
 
             namelist_ascii = []
             for addr in namelist_addresses:
                 if addr is None or addr < 0:
                     namelist_ascii.append("<ponteiro inválido>")
                     continue
-                f.seek(addr)
-                chars = []
-                while True:
-                    byte = f.read(1)
-                    if not byte:
-                        break
-                    if byte[0] in (0x00, 0xCD):
-                        break
-                    try:
-                        chars.append(byte.decode('ascii'))
-                    except UnicodeDecodeError:
-                        chars.append('?')
-                namelist_ascii.append(''.join(chars))
+                namelist_ascii.append(leitor.ler_string(addr))
 
             return (offset, pointer_to_grouplist, dados_verificacao, verifica_group,
                     pointer_to_pck_list, pck_amount, dados_verificacao_pck, verifica_pck,
@@ -175,14 +448,14 @@ def processar_arquivo(caminho_arquivo):
         print(Fore.RED + f"Erro ao abrir ou processar o arquivo: {e}")
         sys.exit(1)
 
-def processar_grupo(caminho_arquivo, group_addr, offset):
+@instrumentado("processar_grupo", lambda a, k, r: {'group_amount': r[1]})
+def processar_grupo(fonte, group_addr, offset):
     if group_addr < 0:
         print(Fore.RED + f"Endereço do grupo negativo: 0x{group_addr:08X}")
         sys.exit(1)
     try:
-        with open(caminho_arquivo, 'rb') as f:
-            f.seek(group_addr)
-            dados_group_verify = f.read(4)
+        with abrir_leitor(fonte) as leitor:
+            dados_group_verify = leitor.ler(group_addr, 4)
             if len(dados_group_verify) < 4:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para verificação do grupo.")
                 sys.exit(1)
@@ -192,22 +465,18 @@ def processar_grupo(caminho_arquivo, group_addr, offset):
             if group_addr + 0x08 < 0:
                 print(Fore.RED + "group_amount: endereço calculado é negativo.")
                 sys.exit(1)
-            f.seek(group_addr + 0x08)
-            dado_group_amount = f.read(1)
-            if len(dado_group_amount) < 1:
+            group_amount = leitor.ler_u8(group_addr + 0x08)
+            if group_amount is None:
                 print(Fore.RED + "Erro: Não foi possível ler 1 byte para group_amount.")
                 sys.exit(1)
-            group_amount = int.from_bytes(dado_group_amount, byteorder='little')
 
             if group_addr + 0x10 < 0:
                 print(Fore.RED + "group_pointer: endereço calculado é negativo.")
                 sys.exit(1)
-            f.seek(group_addr + 0x10)
-            dado_group_pointer = f.read(4)
-            if len(dado_group_pointer) < 4:
+            valor_group_pointer = leitor.ler_u32(group_addr + 0x10)
+            if valor_group_pointer is None:
                 print(Fore.RED + "Erro: O arquivo possui menos de 4 bytes para group_pointer.")
                 sys.exit(1)
-            valor_group_pointer = int.from_bytes(dado_group_pointer, byteorder='little')
             group_pointer = valor_group_pointer - offset
 
             return verifica_grupo, group_amount, group_pointer
@@ -215,53 +484,51 @@ def processar_grupo(caminho_arquivo, group_addr, offset):
         print(Fore.RED + f"Erro ao processar o grupo: {e}")
         sys.exit(1)
 
-def processar_meshgroup(caminho_arquivo, group_pointer, group_amount, offset):
+@instrumentado("processar_meshgroup", lambda a, k, r: {'mesh_entries': len(r)})
+def processar_meshgroup(fonte, group_pointer, group_amount, offset):
     meshgroup = []
     try:
-        with open(caminho_arquivo, 'rb') as f:
+        with abrir_leitor(fonte) as leitor:
             for i in range(group_amount):
                 addr = group_pointer + i * 8
                 if addr < 0:
                     print(Fore.RED + f"Meshgroup: endereço negativo na iteração {i}: 0x{addr:08X}. Pulando este item.")
                     continue
-                f.seek(addr)
-                dado_mesh = f.read(4)
-                if len(dado_mesh) < 4:
+                valor_mesh = leitor.ler_u32(addr)
+                if valor_mesh is None:
                     print(Fore.RED + f"Erro: O arquivo possui menos de 4 bytes para meshgroup na iteração {i}.")
                     sys.exit(1)
-                valor_mesh = int.from_bytes(dado_mesh, byteorder='little')
                 meshgroup.append(valor_mesh - offset)
         return meshgroup
     except Exception as e:
         print(Fore.RED + f"Erro ao processar meshgroup: {e}")
         sys.exit(1)
 
-def processar_mesh_entries(caminho_arquivo, meshgroup, offset):
+@instrumentado("processar_mesh_entries", lambda a, k, r: {'mesh_entries': len(r), 'bytes': 8 * len(r)})
+def processar_mesh_entries(fonte, meshgroup, offset):
     resultados = []
     try:
-        with open(caminho_arquivo, 'rb') as f:
+        with abrir_leitor(fonte) as leitor:
             for idx, addr in enumerate(meshgroup):
                 if addr < 0:
                     print(Fore.RED + f"Mesh entry {idx}: endereço inválido (negativo). Pulando.")
                     continue
-                f.seek(addr)
-                dado_start = f.read(4)
-                if len(dado_start) < 4:
+                valor_start = leitor.ler_u32(addr)
+                if valor_start is None:
                     print(Fore.RED + f"Mesh entry {idx}: não foi possível ler 4 bytes para mesh_start.")
                     continue
-                mesh_start = int.from_bytes(dado_start, 'little') - offset
+                mesh_start = valor_start - offset
 
-                dado_size = f.read(2)
-                if len(dado_size) < 2:
+                valor_size = leitor.ler_u16(addr + 4)
+                if valor_size is None:
                     print(Fore.RED + f"Mesh entry {idx}: não foi possível ler 2 bytes para mesh_size.")
                     continue
-                mesh_size = int.from_bytes(dado_size, 'little') * 0x10
+                mesh_size = valor_size * 0x10
 
-                dado_vtx = f.read(2)
-                if len(dado_vtx) < 2:
+                mesh_vtx_total = leitor.ler_u16(addr + 6)
+                if mesh_vtx_total is None:
                     print(Fore.RED + f"Mesh entry {idx}: não foi possível ler 2 bytes para mesh_vtx_total.")
                     continue
-                mesh_vtx_total = int.from_bytes(dado_vtx, 'little')
 
                 mesh_end = mesh_start + mesh_size
 
@@ -276,210 +543,1671 @@ def processar_mesh_entries(caminho_arquivo, meshgroup, offset):
         print(Fore.RED + f"Erro ao processar mesh entries: {e}")
         sys.exit(1)
 
-def processar_mesh_data(caminho_arquivo, mesh_start, mesh_end, offset):
+# Registros dos strips: vértice = 3 x int16 LE (6 bytes), UV = 2 x int16 LE (4 bytes)
+DTYPE_VERTICE = np.dtype(('<i2', 3))
+DTYPE_UV = np.dtype(('<i2', 2))
+
+def decodificar_registros(chunk, inicio, quantidade, dtype):
+    # Interpreta `quantidade` registros a partir de `inicio` como uma view NumPy,
+    # truncando no fim do chunk (mesmo comportamento do laço por registro).
+    disponiveis = max((len(chunk) - inicio) // dtype.itemsize, 0)
+    n = min(quantidade, disponiveis)
+    if n <= 0:
+        return np.empty((0,) + dtype.shape, dtype=dtype.base)
+    return np.frombuffer(chunk, dtype=dtype, count=n, offset=inicio).copy()
+
+# Tags VIF reconhecidas nos chunks de mesh: (bytes da tag, byte de formato) -> lista de destino.
+# Um único padrão cobre as seis tags; nenhuma delas pode começar dentro dos 4 bytes
+# de outra, então uma varredura única encontra exatamente as mesmas posições que as
+# seis varreduras independentes.
+TAGS_VIF = {
+    (b'\xEE\x00', 0x69): 'vertices1_groups',
+    (b'\x1B\x02', 0x69): 'vertices2_groups',
+    (b'\xC4\x00', 0x65): 'uvs1_groups',
+    (b'\xC4\x00', 0x66): 'uvs1_groups',
+    (b'\xF1\x01', 0x65): 'uvs2_groups',
+    (b'\xF1\x01', 0x66): 'uvs2_groups',
+    (b'\x9A\x00', 0x6A): 'fflags1_groups',
+    (b'\xC7\x01', 0x6A): 'fflags2_groups',
+}
+PADRAO_TAGS_VIF = re.compile(
+    b'\xEE\x00[\x00-\x2A]\x69|\x1B\x02[\x00-\x2A]\x69'
+    b'|\xC4\x00[\x00-\x2A][\x65\x66]|\xF1\x01[\x00-\x2A][\x65\x66]'
+    b'|\x9A\x00[\x00-\x2A]\x6A|\xC7\x01[\x00-\x2A]\x6A')
+
+def varrer_tags_vif(chunk):
+    # Percorre o chunk uma única vez e devolve (chave, posição, contagem, formato),
+    # na ordem em que as tags aparecem no arquivo.
+    for m in PADRAO_TAGS_VIF.finditer(chunk):
+        pos = m.start()
+        tag = bytes(chunk[pos:pos + 2])
+        formato = chunk[pos + 3]
+        yield TAGS_VIF[(tag, formato)], pos, chunk[pos + 2], formato
+
+@instrumentado("processar_mesh_data", _contagens_mesh_data)
+def processar_mesh_data(fonte, mesh_start, mesh_end, offset, como_tuplas=False, cache=None):
     try:
-        with open(caminho_arquivo, 'rb') as f:
-            f.seek(mesh_start)
-            chunk = f.read(mesh_end - mesh_start)
-        resultado = {
-            'vertices1_groups': [],
-            'vertices2_groups': [],
-            'uvs1_groups': [],
-            'uvs2_groups': [],
-            'fflags1_groups': [],
-            'fflags2_groups': []
-        }
-        pat_vert1 = re.compile(b'\xEE\x00([\x00-\x2A])\x69')
-        for m in pat_vert1.finditer(chunk):
-            cnt = m.group(1)[0]
-            st = m.end()
-            verts = []
-            for i in range(cnt):
-                s = st + i * 6
-                e = s + 6
-                if e > len(chunk): break
-                data = chunk[s:e]
-                x = int.from_bytes(data[0:2], 'little', signed=True)
-                y = int.from_bytes(data[2:4], 'little', signed=True)
-                z = int.from_bytes(data[4:6], 'little', signed=True)
-                verts.append((x, y, z))
-            resultado['vertices1_groups'].append({'count': cnt, 'vertices': verts})
-        
-        pat_vert2 = re.compile(b'\x1B\x02([\x00-\x2A])\x69')
-        for m in pat_vert2.finditer(chunk):
-            cnt = m.group(1)[0]
-            st = m.end()
-            verts = []
-            for i in range(cnt):
-                s = st + i * 6
-                e = s + 6
-                if e > len(chunk): break
-                data = chunk[s:e]
-                x = int.from_bytes(data[0:2], 'little', signed=True)
-                y = int.from_bytes(data[2:4], 'little', signed=True)
-                z = int.from_bytes(data[4:6], 'little', signed=True)
-                verts.append((x, y, z))
-            resultado['vertices2_groups'].append({'count': cnt, 'vertices': verts})
-        
-        pat_uv1 = re.compile(b'\xC4\x00([\x00-\x2A])([\x65\x66])')
-        for m in pat_uv1.finditer(chunk):
-            cnt = m.group(1)[0]
-            uv_type = m.group(2)[0]
-            st = m.end()
-            uvs = []
-            if uv_type == 0x65:
-                for i in range(cnt):
-                    s = st + i * 4
-                    e = s + 4
-                    if e > len(chunk): break
-                    data = chunk[s:e]
-                    u = int.from_bytes(data[0:2], 'little', signed=True)
-                    v = int.from_bytes(data[2:4], 'little', signed=True)
-                    uvs.append((u, v))
-            resultado['uvs1_groups'].append({'count': cnt, 'uv_type': uv_type, 'uvs': uvs})
-        
-        pat_uv2 = re.compile(b'\xF1\x01([\x00-\x2A])([\x65\x66])')
-        for m in pat_uv2.finditer(chunk):
-            cnt = m.group(1)[0]
-            uv_type = m.group(2)[0]
-            st = m.end()
-            uvs = []
-            if uv_type == 0x65:
-                for i in range(cnt):
-                    s = st + i * 4
-                    e = s + 4
-                    if e > len(chunk): break
-                    data = chunk[s:e]
-                    u = int.from_bytes(data[0:2], 'little', signed=True)
-                    v = int.from_bytes(data[2:4], 'little', signed=True)
-                    uvs.append((u, v))
-            resultado['uvs2_groups'].append({'count': cnt, 'uv_type': uv_type, 'uvs': uvs})
-        
-        pat_fflags1 = re.compile(b'\x9A\x00([\x00-\x2A])\x6A')
-        for m in pat_fflags1.finditer(chunk):
-            raw = m.group(1)[0]
-            cnt_flags = raw - 2 if raw >= 2 else 0
-            pos = m.end() + 6
-            flags = []
-            for i in range(cnt_flags):
-                if pos >= len(chunk): break
-                flags.append(chunk[pos])
-                pos += 3
-            resultado['fflags1_groups'].append({'count': raw, 'flags': [("ativado" if v % 2 == 0 else "desativado") for v in flags]})
-        
-        pat_fflags2 = re.compile(b'\xC7\x01([\x00-\x2A])\x6A')
-        for m in pat_fflags2.finditer(chunk):
-            raw = m.group(1)[0]
-            cnt_flags = raw - 2 if raw >= 2 else 0
-            pos = m.end() + 6
-            flags = []
-            for i in range(cnt_flags):
-                if pos >= len(chunk): break
-                flags.append(chunk[pos])
-                pos += 3
-            resultado['fflags2_groups'].append({'count': raw, 'flags': [("ativado" if v % 2 == 0 else "desativado") for v in flags]})
-        
+        with abrir_leitor(fonte) as leitor:
+            chave = cache.chave(leitor, mesh_start, mesh_end) if cache is not None else None
+            resultado = cache.obter(chave) if chave is not None else None
+            if resultado is None:
+                with leitor.fatia(mesh_start, mesh_end) as chunk:
+                    resultado = decodificar_chunk(chunk)
+                if chave is not None:
+                    cache.guardar(chave, resultado)
+        if como_tuplas:
+            return converter_para_tuplas(resultado)
         return resultado
     except Exception as e:
         print(Fore.RED + f"Erro ao processar mesh data: {e}")
         sys.exit(1)
 
-def gerar_faces(vertices, flags):
-    num_vertices = len(vertices)
-    num_faces = max(num_vertices - 2, 0)
-    faces = []
-    face_status = []
-    for i in range(num_faces):
-        face = [3, i, i+1, i+2]
-        faces.append(face)
-        if i < len(flags):
-            face_status.append(1 if flags[i] == "ativado" else 0)
+def decodificar_chunk(chunk):
+    # Decodifica um chunk de mesh (bytes ou memoryview); os arrays devolvidos são
+    # cópias, então a view pode ser liberada logo em seguida.
+    resultado = {
+        'vertices1_groups': [],
+        'vertices2_groups': [],
+        'uvs1_groups': [],
+        'uvs2_groups': [],
+        'fflags1_groups': [],
+        'fflags2_groups': []
+    }
+    for chave, pos, cnt, formato in varrer_tags_vif(chunk):
+        st = pos + 4
+        if chave.startswith('vertices'):
+            verts = decodificar_registros(chunk, st, cnt, DTYPE_VERTICE)
+            resultado[chave].append({'count': cnt, 'pos': pos, 'vertices': verts})
+        elif chave.startswith('uvs'):
+            uvs = decodificar_registros(chunk, st, cnt if formato == 0x65 else 0, DTYPE_UV)
+            resultado[chave].append({'count': cnt, 'uv_type': formato, 'pos': pos, 'uvs': uvs})
+        else:
+            # Um byte de flag a cada 3 bytes, 6 bytes após a tag; par = face ativada
+            cnt_flags = cnt - 2 if cnt >= 2 else 0
+            inicio = st + 6
+            bytes_flags = np.frombuffer(chunk, dtype=np.uint8)[inicio:inicio + 3 * cnt_flags:3]
+            resultado[chave].append({'count': cnt, 'pos': pos, 'flags': (bytes_flags & 1) == 0})
+    return resultado
+
+def flags_para_texto(flags):
+    # Forma legível das flags (True/False -> "ativado"/"desativado"), para depuração
+    return ["ativado" if f else "desativado" for f in np.asarray(flags, dtype=np.bool_).tolist()]
+
+def converter_para_tuplas(resultado):
+    # Compatibilidade: devolve vértices/UVs no formato antigo (listas de tuplas de int)
+    # e as flags como strings "ativado"/"desativado"
+    for chave, campo in (('vertices1_groups', 'vertices'), ('vertices2_groups', 'vertices'),
+                         ('uvs1_groups', 'uvs'), ('uvs2_groups', 'uvs')):
+        for grupo in resultado[chave]:
+            grupo[campo] = [tuple(reg) for reg in np.asarray(grupo[campo]).tolist()]
+    for chave in ('fflags1_groups', 'fflags2_groups'):
+        for grupo in resultado[chave]:
+            grupo['flags'] = flags_para_texto(grupo['flags'])
+    return resultado
+
+# ---------------------------
+# Extração paralela: pool de processos sobre grupos e mesh entries
+# ---------------------------
+CAMPOS_RESULTADO = {
+    'vertices1_groups': ('vertices', DTYPE_VERTICE),
+    'vertices2_groups': ('vertices', DTYPE_VERTICE),
+    'uvs1_groups': ('uvs', DTYPE_UV),
+    'uvs2_groups': ('uvs', DTYPE_UV),
+    'fflags1_groups': ('flags', np.dtype(np.bool_)),
+    'fflags2_groups': ('flags', np.dtype(np.bool_)),
+}
+
+def compactar_resultado(resultado):
+    # Junta os grupos de cada chave em um único array + tamanhos, para que o
+    # retorno dos workers seja barato de serializar.
+    compacto = {}
+    for chave, (campo, dtype) in CAMPOS_RESULTADO.items():
+        grupos = resultado[chave]
+        meta = np.array([(g['count'], g['pos'], g.get('uv_type', 0)) for g in grupos],
+                        dtype=np.int32).reshape(-1, 3)
+        partes = [np.asarray(g[campo]) for g in grupos]
+        tamanhos = np.array([len(p) for p in partes], dtype=np.int32)
+        if partes:
+            dados = np.concatenate(partes).astype(dtype.base, copy=False)
+        else:
+            dados = np.empty((0,) + dtype.shape, dtype=dtype.base)
+        compacto[chave] = (meta, tamanhos, dados)
+    return compacto
+
+def expandir_resultado(compacto):
+    # Inverso de compactar_resultado: volta ao formato de processar_mesh_data
+    resultado = {}
+    for chave, (campo, _) in CAMPOS_RESULTADO.items():
+        meta, tamanhos, dados = compacto[chave]
+        partes = np.split(dados, np.cumsum(tamanhos)[:-1]) if len(tamanhos) else []
+        grupos = []
+        for (count, pos, uv_type), parte in zip(meta.tolist(), partes):
+            grupo = {'count': count, 'pos': pos}
+            if campo == 'uvs':
+                grupo['uv_type'] = uv_type
+            grupo[campo] = parte
+            grupos.append(grupo)
+        resultado[chave] = grupos
+    return resultado
+
+# Cada worker mantém o seu próprio mmap do pack; só offsets trafegam entre processos
+_LEITORES_WORKER = {}
+
+def _leitor_worker(caminho):
+    leitor = _LEITORES_WORKER.get(caminho)
+    if leitor is None:
+        for antigo in _LEITORES_WORKER.values():
+            antigo.fechar()
+        _LEITORES_WORKER.clear()
+        leitor = _LEITORES_WORKER[caminho] = LeitorPack(caminho)
+    return leitor
+
+def _worker_entradas_grupo(caminho, group_addr, offset):
+    leitor = _leitor_worker(caminho)
+    _, group_amount, group_pointer = processar_grupo(leitor, group_addr, offset)
+    meshgroup = processar_meshgroup(leitor, group_pointer, group_amount, offset)
+    return processar_mesh_entries(leitor, meshgroup, offset)
+
+def _worker_decodificar(caminho, faixas, offset):
+    leitor = _leitor_worker(caminho)
+    return [compactar_resultado(processar_mesh_data(leitor, mesh_start, mesh_end, offset))
+            for mesh_start, mesh_end in faixas]
+
+class FilaDecodificacao:
+    # Lotes de mesh entries decodificados no pool e entregues na ordem de envio.
+    # No máximo `janela` lotes ficam em andamento: um lote novo só é enviado
+    # quando o mais antigo é consumido, então os workers não se adiantam à exportação.
+    def __init__(self, executor, caminho, offset, entradas, lote, janela):
+        self._executor = executor
+        self._caminho = caminho
+        self._offset = offset
+        self._lotes = ([(e['mesh_start'], e['mesh_end']) for e in entradas[i:i + lote]]
+                       for i in range(0, len(entradas), lote))
+        self._janela = janela
+        self._pendentes = deque()
+        self._prontos = deque()
+        self._encher()
+
+    def _encher(self):
+        while len(self._pendentes) < self._janela:
+            faixas = next(self._lotes, None)
+            if faixas is None:
+                break
+            self._pendentes.append(self._executor.submit(_worker_decodificar, self._caminho,
+                                                         faixas, self._offset))
+
+    def proximo(self):
+        if not self._prontos:
+            futuro = self._pendentes.popleft()
+            self._encher()
+            self._prontos.extend(futuro.result())
+        return expandir_resultado(self._prontos.popleft())
+
+class DadosAdiados:
+    # dados_entradas de um grupo, obtidos em ordem no primeiro acesso. Só a
+    # entrada atual fica referenciada; índices anteriores não podem ser relidos
+    # e os pulados são obtidos e descartados. As exportações percorrem as mesh
+    # entries em sequência, então a memória fica limitada como na decodificação serial.
+    def __init__(self, obter, quantidade):
+        self._obter = obter
+        self._quantidade = quantidade
+        self._proximo = 0
+        self._atual = None
+
+    def __len__(self):
+        return self._quantidade
+
+    def __getitem__(self, indice):
+        if self._atual is not None and self._atual[0] == indice:
+            return self._atual[1]
+        if not self._proximo <= indice < self._quantidade:
+            raise IndexError(f"mesh entry {indice} fora de ordem ou inexistente")
+        while self._proximo <= indice:
+            item = self._obter(self._proximo)
+            self._proximo += 1
+        self._atual = (indice, item)
+        return item
+
+    def esgotar(self):
+        self._atual = None
+        while self._proximo < self._quantidade:
+            self._obter(self._proximo)
+            self._proximo += 1
+
+def extrair_paralelo(leitor, offset, group_addrs, processos=None, cache=None, pular=None):
+    # Gera (group_addr, mesh_entries, dados_entradas) na ordem de group_addrs.
+    # Os cabeçalhos dos grupos são lidos pelo pool; depois as mesh entries que
+    # faltam no cache, e que `pular(índice do grupo, me_idx, entry)` não
+    # descarta, são decodificadas em lotes, no máximo dois por processo em
+    # andamento. Entradas puladas chegam como None. O cache é consultado e
+    # gravado só neste processo: os workers não calculam o hash do pack nem
+    # disputam os arquivos do cache.
+    processos = processos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        listas = list(executor.map(_worker_entradas_grupo, repeat(leitor.caminho),
+                                   group_addrs, repeat(offset)))
+        planos = []
+        faltantes = []
+        for g_idx, mesh_entries in enumerate(listas):
+            plano = []
+            for me_idx, entry in enumerate(mesh_entries, start=1):
+                chave = cache.chave(leitor, entry['mesh_start'], entry['mesh_end']) if cache is not None else None
+                if pular is not None and pular(g_idx, me_idx, entry):
+                    origem = None
+                elif chave is not None and cache.contem(chave):
+                    origem = "cache"
+                else:
+                    origem = "pool"
+                    faltantes.append(entry)
+                plano.append((origem, entry, chave))
+            planos.append(plano)
+        fila = FilaDecodificacao(executor, leitor.caminho, offset, faltantes,
+                                 max(1, min(len(faltantes) // (processos * 8), 16)), 2 * processos)
+
+        def obter(plano, indice):
+            origem, entry, chave = plano[indice]
+            if origem == "cache":
+                return processar_mesh_data(leitor, entry['mesh_start'], entry['mesh_end'], offset, cache=cache)
+            if origem == "pool":
+                resultado = fila.proximo()
+                if chave is not None:
+                    cache.guardar(chave, resultado)
+                return resultado
+            return None
+
+        for group_addr, mesh_entries, plano in zip(group_addrs, listas, planos):
+            dados = DadosAdiados(functools.partial(obter, plano), len(plano))
+            yield group_addr, mesh_entries, dados
+            dados.esgotar()
+
+# ---------------------------
+# Cache persistente dos dados decodificados (segmentos mapeados em memória)
+# ---------------------------
+def _umask_atual():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# Lida uma vez, ao importar: os.umask só pode ser consultado alterando-o
+MODO_ARQUIVO = 0o666 & ~_umask_atual()
+
+def gravar_atomico(destino, escrever):
+    # Grava em um temporário no mesmo diretório e renomeia: leitores concorrentes
+    # nunca veem um arquivo pela metade. O mkstemp cria o temporário com 0600;
+    # o arquivo final recebe as permissões normais de um arquivo novo (umask).
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(destino) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            escrever(f)
+        os.chmod(temporario, MODO_ARQUIVO)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+class SegmentoCache:
+    # Mesh entries de um pack gravadas juntas em um arquivo <hash>.<id>.seg:
+    # "MC3C", tamanho do cabeçalho (u32), cabeçalho JSON com dtype, forma e
+    # deslocamento de cada array, e os arrays crus alinhados em 16 bytes. Há as
+    # faixas (mesh_start, mesh_end) em ordem e, para cada chave de
+    # processar_mesh_data, o primeiro strip de cada mesh entry, os metadados e
+    # limites dos strips e os dados de todos eles. O arquivo é aberto com mmap:
+    # uma consulta lê só as páginas da mesh entry pedida.
+    MAGIA = b"MC3C"
+    __slots__ = ('entradas', 'campos')
+
+    def __init__(self, caminho):
+        buf = np.memmap(caminho, dtype=np.uint8, mode='r')
+        if bytes(buf[:4]) != self.MAGIA:
+            raise ValueError(f"segmento de cache inválido: {caminho}")
+        tamanho = int.from_bytes(bytes(buf[4:8]), 'little')
+        base = 8 + tamanho
+        arrays = {}
+        for nome, (dtype, forma, deslocamento) in json.loads(bytes(buf[8:base])).items():
+            dtype = np.dtype(dtype)
+            arrays[nome] = np.frombuffer(buf, dtype=dtype, count=int(np.prod(forma)),
+                                         offset=base + deslocamento).reshape(forma)
+        self.entradas = arrays['entradas']
+        self.campos = {chave: (campo, arrays[chave + "_strips"], arrays[chave + "_meta"],
+                               arrays[chave + "_limites"], arrays[chave + "_dados"])
+                       for chave, (campo, _) in CAMPOS_RESULTADO.items()}
+
+    @classmethod
+    def gravar(cls, f, itens):
+        # [(mesh_start, mesh_end, compacto)] -> arquivo de segmento
+        itens = sorted(itens, key=lambda item: item[:2])
+        arrays = {'entradas': np.array([(inicio, fim) for inicio, fim, _ in itens],
+                                       dtype=np.int64).reshape(-1, 2)}
+        for chave in CAMPOS_RESULTADO:
+            partes = [compacto[chave] for _, _, compacto in itens]
+            strips = np.zeros(len(partes) + 1, dtype=np.int64)
+            np.cumsum([len(meta) for meta, _, _ in partes], out=strips[1:])
+            tamanhos = np.concatenate([tamanhos for _, tamanhos, _ in partes])
+            limites = np.zeros(len(tamanhos) + 1, dtype=np.int64)
+            np.cumsum(tamanhos, out=limites[1:])
+            arrays[chave + "_strips"] = strips
+            arrays[chave + "_meta"] = np.concatenate([meta for meta, _, _ in partes])
+            arrays[chave + "_limites"] = limites
+            arrays[chave + "_dados"] = np.concatenate([dados for _, _, dados in partes])
+        descricao = {}
+        deslocamento = 0
+        for nome, array in arrays.items():
+            deslocamento += -deslocamento % 16
+            descricao[nome] = [array.dtype.str, list(array.shape), deslocamento]
+            deslocamento += array.nbytes
+        cabecalho = json.dumps(descricao).encode()
+        cabecalho += b' ' * (-(8 + len(cabecalho)) % 16)
+        f.write(cls.MAGIA + struct.pack('<I', len(cabecalho)) + cabecalho)
+        escritos = 0
+        for nome, array in arrays.items():
+            f.write(bytes(descricao[nome][2] - escritos))
+            f.write(np.ascontiguousarray(array).tobytes())
+            escritos = descricao[nome][2] + array.nbytes
+
+    def posicao(self, faixa):
+        # Índice da mesh entry (busca binária nas faixas ordenadas) ou None
+        inicio, fim = faixa
+        inicios = self.entradas[:, 0]
+        i = int(np.searchsorted(inicios, inicio))
+        while i < len(inicios) and inicios[i] == inicio:
+            if self.entradas[i, 1] == fim:
+                return i
+            i += 1
+        return None
+
+    def resultado(self, posicao):
+        # Mesmo formato de processar_mesh_data; os dados são views somente leitura do mmap
+        resultado = {}
+        for chave, (campo, strips, meta, limites, dados) in self.campos.items():
+            s0, s1 = strips[posicao:posicao + 2].tolist()
+            limites_strips = limites[s0:s1 + 1].tolist()
+            grupos = []
+            for j, (count, pos, uv_type) in enumerate(meta[s0:s1].tolist()):
+                grupo = {'count': count, 'pos': pos}
+                if campo == 'uvs':
+                    grupo['uv_type'] = uv_type
+                grupo[campo] = dados[limites_strips[j]:limites_strips[j + 1]]
+                grupos.append(grupo)
+            resultado[chave] = grupos
+        return resultado
+
+class CacheMalhas:
+    # Guarda o resultado de processar_mesh_data por mesh entry, chaveado pelo hash
+    # do conteúdo do pack + mesh_start/mesh_end. As entradas de um pack ficam em
+    # segmentos <hash>.<id>.seg mapeados em memória (SegmentoCache), dos quais só
+    # as mesh entries pedidas são lidas; as decodificadas nesta execução viram um
+    # segmento novo quando o pack é fechado (ou antes, se passarem de
+    # LIMITE_PENDENTE bytes). Um pack alterado gera chaves novas; os arquivos
+    # antigos saem pelo descarte LRU (mtime) quando o limite é excedido, contado
+    # por um inventário em memória.
+    ARQUIVO_HASHES = "hashes.json"
+    LIMITE_PENDENTE = 64 << 20
+
+    def __init__(self, diretorio, limite_bytes=1 << 30):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        os.makedirs(diretorio, exist_ok=True)
+        self._arquivos = {}  # nome -> [mtime_ns, tamanho]; inclui formatos antigos, que só envelhecem
+        for nome in os.listdir(diretorio):
+            if nome.endswith((".seg", ".npz")):
+                try:
+                    info = os.stat(os.path.join(diretorio, nome))
+                except OSError:
+                    continue
+                self._arquivos[nome] = [info.st_mtime_ns, info.st_size]
+        self._total = sum(tamanho for _, tamanho in self._arquivos.values())
+        self._segmentos = {}  # hash -> [SegmentoCache]
+        self._pendentes = {}  # hash -> {(mesh_start, mesh_end): compacto}
+        self._bytes_pendentes = 0
+        self.descartar()
+
+    def hash_pack(self, leitor):
+        # Reaproveita o hash de execuções anteriores se tamanho e mtime não mudaram
+        if leitor.hash is not None:
+            return leitor.hash
+        caminho_hashes = os.path.join(self.diretorio, self.ARQUIVO_HASHES)
+        info = os.stat(leitor.caminho)
+        identidade = [info.st_size, info.st_mtime_ns]
+        caminho_real = os.path.realpath(leitor.caminho)
+        try:
+            with open(caminho_hashes) as f:
+                hashes = json.load(f)
+        except (OSError, ValueError):
+            hashes = {}
+        registro = hashes.get(caminho_real)
+        if registro and registro[:2] == identidade:
+            leitor.hash = registro[2]
         else:
-            face_status.append(1)
-    return faces, face_status
+            hashes[caminho_real] = identidade + [leitor.hash_conteudo()]
+            gravar_atomico(caminho_hashes, lambda f: f.write(json.dumps(hashes).encode()))
+        return leitor.hash
+
+    def chave(self, leitor, mesh_start, mesh_end):
+        return self.hash_pack(leitor), mesh_start, mesh_end
+
+    def _abrir(self, nome):
+        caminho = os.path.join(self.diretorio, nome)
+        try:
+            segmento = SegmentoCache(caminho)
+            os.utime(caminho)  # marca como usado recentemente
+        except (OSError, KeyError, ValueError):
+            return None
+        self._arquivos[nome][0] = time.time_ns()
+        return segmento
+
+    def _segmentos_pack(self, hash_pack):
+        # Abre (uma vez) os segmentos do pack; só os cabeçalhos são lidos aqui
+        segmentos = self._segmentos.get(hash_pack)
+        if segmentos is None:
+            nomes = [n for n in self._arquivos if n.startswith(hash_pack + ".") and n.endswith(".seg")]
+            segmentos = self._segmentos[hash_pack] = [s for s in map(self._abrir, nomes) if s is not None]
+        return segmentos
+
+    def _localizar(self, hash_pack, faixa):
+        for segmento in self._segmentos_pack(hash_pack):
+            posicao = segmento.posicao(faixa)
+            if posicao is not None:
+                return segmento, posicao
+        return None
+
+    def contem(self, chave):
+        hash_pack, faixa = chave[0], chave[1:]
+        return faixa in self._pendentes.get(hash_pack, ()) or self._localizar(hash_pack, faixa) is not None
+
+    def obter(self, chave):
+        hash_pack, faixa = chave[0], chave[1:]
+        compacto = self._pendentes.get(hash_pack, {}).get(faixa)
+        if compacto is not None:
+            return expandir_resultado(compacto)
+        local = self._localizar(hash_pack, faixa)
+        if local is None:
+            return None
+        segmento, posicao = local
+        return segmento.resultado(posicao)
+
+    def guardar(self, chave, resultado):
+        hash_pack, faixa = chave[0], chave[1:]
+        compacto = compactar_resultado(resultado)
+        self._pendentes.setdefault(hash_pack, {})[faixa] = compacto
+        self._bytes_pendentes += sum(meta.nbytes + tamanhos.nbytes + dados.nbytes
+                                     for meta, tamanhos, dados in compacto.values())
+        if self._bytes_pendentes > self.LIMITE_PENDENTE:
+            self.gravar_pendentes()
+
+    def gravar_pendentes(self):
+        # Um segmento novo por pack com as entradas decodificadas desde a última gravação
+        pendentes, self._pendentes, self._bytes_pendentes = self._pendentes, {}, 0
+        for hash_pack, entradas in pendentes.items():
+            itens = [(inicio, fim, compacto) for (inicio, fim), compacto in entradas.items()]
+            nome = f"{hash_pack}.{uuid.uuid4().hex}.seg"
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                gravar_atomico(caminho, lambda f: SegmentoCache.gravar(f, itens))
+                tamanho = os.path.getsize(caminho)
+            except OSError as e:
+                print(Fore.RED + f"Aviso: não foi possível gravar no cache: {e}")
+                continue
+            self._arquivos[nome] = [time.time_ns(), tamanho]
+            self._total += tamanho
+            if hash_pack in self._segmentos:
+                segmento = self._abrir(nome)
+                if segmento is not None:
+                    self._segmentos[hash_pack].append(segmento)
+        self.descartar()
+
+    def concluir(self):
+        # Fim do uso dos packs abertos: grava as entradas pendentes e fecha os segmentos
+        self.gravar_pendentes()
+        self._segmentos.clear()
+
+    def descartar(self):
+        # Remove os arquivos menos usados recentemente até caber no limite
+        if self._total <= self.limite_bytes:
+            return
+        for nome, (_, tamanho) in sorted(self._arquivos.items(), key=lambda item: item[1][0]):
+            if self._total <= self.limite_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+            except OSError:
+                pass
+            del self._arquivos[nome]
+            self._total -= tamanho
+
+def mascara_flags(flags, num_faces):
+    # Flags do strip -> array booleano (True = face ativa) com exatamente num_faces
+    # posições; faces sem flag correspondente ficam ativas. Aceita também a forma
+    # em texto ("ativado"/"desativado").
+    flags = np.asarray(flags)
+    if flags.dtype.kind in 'US':
+        ativas = flags == "ativado"
+    else:
+        ativas = flags.astype(np.bool_, copy=False)
+    mascara = np.ones(num_faces, dtype=np.bool_)
+    n = min(len(ativas), num_faces)
+    mascara[:n] = ativas[:n]
+    return mascara
+
+@instrumentado("faces", lambda a, k, r: {'vertices': a[0], 'faces': len(r)})
+def faces_strip(num_vertices, flags=None, base=0, alternar=True, vtk=False):
+    # Converte um triangle strip inteiro em lista de triângulos de uma vez:
+    # devolve só as faces ativas, (n, 3) com índices + base, ou (n, 4) no formato
+    # de célula do VTK. Com `alternar`, as faces ímpares têm a ordem invertida para
+    # manter o mesmo winding ao longo do strip.
+    num_faces = max(num_vertices - 2, 0)
+    i = np.arange(num_faces, dtype=np.int64)
+    faces = np.column_stack([i, i + 1, i + 2])
+    if alternar:
+        faces[1::2, [1, 2]] = faces[1::2, [2, 1]]
+    if flags is not None:
+        faces = faces[mascara_flags(flags, num_faces)]
+    faces += base
+    if vtk:
+        faces = np.column_stack([np.full(len(faces), 3, dtype=np.int64), faces])
+    return faces
+
+def gerar_faces(vertices, flags):
+    # Compatibilidade: todas as faces do strip (sem alternar o winding) no formato
+    # [3, i, i+1, i+2] e o status de cada uma (1 = ativada)
+    num_faces = max(len(vertices) - 2, 0)
+    faces = faces_strip(len(vertices), alternar=False, vtk=True)
+    return faces, mascara_flags(flags, num_faces).astype(np.uint8)
 
 def sanitizar_nome(nome):
     return re.sub(r'[\\/*?:"<>|]', "_", nome).strip()
 
 def scale_vertices(vertices, scale=256.0):
-    return [(x/scale, y/scale, z/scale) for (x, y, z) in vertices]
+    return np.asarray(vertices, dtype=np.float64).reshape(-1, 3) / scale
 
 def scale_uvs(uvs, scale=256.0):
-    return [(u/scale, v/scale) for (u, v) in uvs]
+    return np.asarray(uvs, dtype=np.float64).reshape(-1, 2) / scale
+
+def completar_uvs(uvs, num_vertices):
+    # Preenche com (0, 0) (ou corta) para que haja exatamente uma UV por vértice
+    uvs = np.asarray(uvs).reshape(-1, 2)
+    if len(uvs) >= num_vertices:
+        return uvs[:num_vertices] if len(uvs) > num_vertices else uvs
+    completo = np.zeros((num_vertices, 2), dtype=uvs.dtype)
+    completo[:len(uvs)] = uvs
+    return completo
+
+def agrupar_chaves(chaves):
+    # Agrupa as linhas iguais de `chaves` com um único np.unique sobre as linhas
+    # empacotadas em bytes. Devolve o índice da primeira ocorrência de cada grupo
+    # (em ordem de aparição) e o grupo de cada linha.
+    chaves = np.ascontiguousarray(chaves)
+    compactas = chaves.view(np.dtype((np.void, chaves.dtype.itemsize * chaves.shape[1]))).ravel()
+    _, primeiros, inverso = np.unique(compactas, return_index=True, return_inverse=True)
+    ordem = np.argsort(primeiros)
+    novo_indice = np.empty(len(ordem), dtype=np.int64)
+    novo_indice[ordem] = np.arange(len(ordem))
+    return primeiros[ordem], novo_indice[inverso.ravel()]
+
+def faces_validas(faces):
+    # Máscara dos triângulos com três vértices distintos
+    return (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+
+@instrumentado("solda", lambda a, k, r: {'vertices': len(r[0]), 'faces': len(r[1])})
+def soldar_vertices(vertices, uvs, faces, passo=0, grupos=None):
+    # Funde vértices com a mesma chave posição+UV (exata, ou quantizada em
+    # múltiplos de `passo`) e descarta os triângulos que ficam degenerados.
+    # `grupos` (um id por vértice) impede a fusão entre grupos diferentes.
+    # Devolve os índices dos vértices mantidos, na ordem da primeira ocorrência,
+    # as faces remapeadas e a máscara das faces mantidas.
+    chaves = np.column_stack([np.asarray(vertices, dtype=np.float64).reshape(-1, 3),
+                              np.asarray(uvs, dtype=np.float64).reshape(-1, 2)])
+    if passo:
+        chaves = np.round(chaves / passo)
+    chaves += 0.0  # -0.0 e 0.0 viram a mesma chave
+    if grupos is not None:
+        chaves = np.column_stack([grupos, chaves])
+    primeiros, mapa = agrupar_chaves(chaves)
+    faces = mapa[np.asarray(faces, dtype=np.int64).reshape(-1, 3)]
+    mantidas = faces_validas(faces)
+    return primeiros, faces[mantidas], mantidas
+
+@instrumentado("simplificacao", lambda a, k, r: {'vertices': len(r[1]), 'faces': len(r[3])})
+def simplificar_vertices(vertices, uvs, faces, tamanho_celula, grupos=None):
+    # Decimação por agrupamento em grade: os vértices de cada célula cúbica de
+    # lado `tamanho_celula` viram um só, na média das posições e UVs; triângulos
+    # degenerados ou repetidos são descartados. `grupos` como em soldar_vertices.
+    # Devolve o primeiro vértice original de cada célula, os vértices e UVs
+    # novos, as faces remapeadas e a máscara das faces mantidas.
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 2)
+    chaves = np.floor(vertices / tamanho_celula) + 0.0
+    if grupos is not None:
+        chaves = np.column_stack([grupos, chaves])
+    primeiros, mapa = agrupar_chaves(chaves)
+    quantidade = np.bincount(mapa, minlength=len(primeiros))[:, None]
+    medias = [np.column_stack([np.bincount(mapa, weights=array[:, eixo], minlength=len(primeiros))
+                               for eixo in range(array.shape[1])]) / quantidade
+              for array in (vertices, uvs)]
+    faces = mapa[np.asarray(faces, dtype=np.int64).reshape(-1, 3)]
+    mantidas = faces_validas(faces)
+    # Das faces que sobraram, só a primeira de cada trio de vértices
+    restantes = np.flatnonzero(mantidas)
+    unicas, _ = agrupar_chaves(np.sort(faces[restantes], axis=1))
+    mantidas[:] = False
+    mantidas[restantes[unicas]] = True
+    return primeiros, medias[0], medias[1], faces[mantidas], mantidas
+
+# ---------------------------
+# Modelo de objetos do pack: Pack -> Grupo -> MeshEntry -> Strip
+# ---------------------------
+PADROES_STRIP = [(1, 'vertices1_groups', 'uvs1_groups', 'fflags1_groups'),
+                 (2, 'vertices2_groups', 'uvs2_groups', 'fflags2_groups')]
+
+class Strip:
+    # Um triangle strip decodificado: vértices e UVs int16 brutos, flags booleanas
+    __slots__ = ('padrao', 'indice', 'vertices', 'uvs', 'flags')
+
+    def __init__(self, padrao, indice, vertices, uvs, flags):
+        self.padrao = padrao
+        self.indice = indice
+        self.vertices = vertices
+        self.uvs = uvs
+        self.flags = flags
+
+    def faces(self, base=0, alternar=True):
+        return faces_strip(len(self.vertices), self.flags, base=base, alternar=alternar)
+
+def strips_de_dados(dados_internos):
+    # Emparelha cada grupo de vértices com o grupo de UVs/flags de mesmo índice
+    # (UVs faltantes viram (0, 0); sem flags, todas as faces ficam ativas)
+    strips = []
+    for padrao, key_verts, key_uvs, key_fflags in PADROES_STRIP:
+        uv_groups = dados_internos.get(key_uvs, [])
+        fflags_groups = dados_internos.get(key_fflags, [])
+        for gi, group in enumerate(dados_internos.get(key_verts, [])):
+            verts = group['vertices']
+            uvs = uv_groups[gi]['uvs'] if gi < len(uv_groups) else []
+            flags = fflags_groups[gi]['flags'] if gi < len(fflags_groups) else None
+            strips.append(Strip(padrao, gi + 1, verts, completar_uvs(uvs, len(verts)), flags))
+    return strips
+
+class MeshEntry:
+    # Faixa [mesh_start, mesh_end) de um grupo; os dados só são decodificados no
+    # primeiro acesso a `dados`/`strips` e ficam memorizados até liberar()
+    __slots__ = ('grupo', 'indice', 'mesh_start', 'mesh_size', 'mesh_vtx_total', 'mesh_end',
+                 '_dados', '_strips')
+
+    def __init__(self, grupo, indice, entry):
+        self.grupo = grupo
+        self.indice = indice
+        self.mesh_start = entry['mesh_start']
+        self.mesh_size = entry['mesh_size']
+        self.mesh_vtx_total = entry['mesh_vtx_total']
+        self.mesh_end = entry['mesh_end']
+        self._dados = None
+        self._strips = None
+
+    def como_dict(self):
+        # Formato de processar_mesh_entries, aceito pelas funções de exportação
+        return {'mesh_start': self.mesh_start, 'mesh_size': self.mesh_size,
+                'mesh_vtx_total': self.mesh_vtx_total, 'mesh_end': self.mesh_end}
+
+    @property
+    def dados(self):
+        if self._dados is None:
+            pack = self.grupo.pack
+            self._dados = processar_mesh_data(pack.leitor, self.mesh_start, self.mesh_end,
+                                              pack.offset, cache=pack.cache)
+        return self._dados
+
+    @property
+    def strips(self):
+        if self._strips is None:
+            self._strips = strips_de_dados(self.dados)
+        return self._strips
+
+    def contar_tags(self):
+        # Quantas tags VIF de cada tipo há na faixa, e a soma das contagens
+        # declaradas nas tags de vértices, sem decodificar nenhum dado
+        contagens = dict.fromkeys(CAMPOS_RESULTADO, 0)
+        vertices_declarados = 0
+        with self.grupo.pack.leitor.fatia(self.mesh_start, self.mesh_end) as chunk:
+            for chave, _, cnt, _ in varrer_tags_vif(chunk):
+                contagens[chave] += 1
+                if chave.startswith('vertices'):
+                    vertices_declarados += cnt
+        return contagens, vertices_declarados
+
+    def liberar(self):
+        self._dados = None
+        self._strips = None
+
+class Grupo:
+    # Entrada do PCK_INDEX; o cabeçalho e a tabela de mesh entries só são lidos
+    # quando acessados
+    __slots__ = ('pack', 'indice', 'nome', 'endereco', '_cabecalho', '_entradas')
+
+    def __init__(self, pack, indice, nome, endereco):
+        self.pack = pack
+        self.indice = indice
+        self.nome = nome
+        self.endereco = endereco
+        self._cabecalho = None
+        self._entradas = None
+
+    def _ler_cabecalho(self):
+        if self._cabecalho is None:
+            self._cabecalho = processar_grupo(self.pack.leitor, self.endereco, self.pack.offset)
+        return self._cabecalho
+
+    @property
+    def verifica_grupo(self):
+        return self._ler_cabecalho()[0]
+
+    @property
+    def group_amount(self):
+        return self._ler_cabecalho()[1]
+
+    @property
+    def group_pointer(self):
+        return self._ler_cabecalho()[2]
+
+    @property
+    def entradas(self):
+        if self._entradas is None:
+            leitor, offset = self.pack.leitor, self.pack.offset
+            meshgroup = processar_meshgroup(leitor, self.group_pointer, self.group_amount, offset)
+            self._entradas = [MeshEntry(self, i, e) for i, e in
+                              enumerate(processar_mesh_entries(leitor, meshgroup, offset), start=1)]
+        return self._entradas
+
+    @property
+    def mesh_entries(self):
+        return [e.como_dict() for e in self.entradas]
+
+    @property
+    def nome_saida(self):
+        if self.nome == "<ponteiro inválido>":
+            return f"grupo_sem_nome_{self.indice}"
+        return sanitizar_nome(self.nome) or f"grupo_{self.indice}"
+
+    def liberar(self):
+        for entrada in self._entradas or ():
+            entrada.liberar()
+
+    def __repr__(self):
+        return f"<Grupo {self.indice} {self.nome!r} @ 0x{self.endereco:08X}>"
+
+class Pack:
+    # Lê só o cabeçalho e as tabelas PCK/NAMELIST ao abrir; grupos e dados de
+    # mesh são carregados sob demanda. Aceita um caminho ou um LeitorPack aberto.
+    # Com `indice` (dados de um IndicePack válido), nada é lido do cabeçalho nem
+    # das tabelas de grupos: só os bytes das mesh entries usadas.
+    __slots__ = ('leitor', 'cache', 'offset', 'pointer_to_grouplist', 'verifica_group',
+                 'pointer_to_pck_list', 'verifica_pck', 'pck_mesh_list', 'pck_name_list',
+                 'pck_index', 'namelist_ascii', 'grupos', '_por_nome', '_proprio_leitor')
+
+    def __init__(self, fonte, cache=None, indice=None):
+        self._proprio_leitor = not isinstance(fonte, LeitorPack)
+        self.leitor = LeitorPack(fonte) if self._proprio_leitor else fonte
+        self.cache = cache
+        self._por_nome = None
+        if indice is not None:
+            self._carregar_indice(indice)
+            return
+        (self.offset, self.pointer_to_grouplist, _, self.verifica_group,
+         self.pointer_to_pck_list, _, _, self.verifica_pck,
+         self.pck_mesh_list, self.pck_name_list, self.pck_index,
+         self.namelist_ascii) = processar_arquivo(self.leitor)
+        self.grupos = [Grupo(self, i, nome, endereco) for i, (endereco, nome) in
+                       enumerate(zip(self.pck_index, self.namelist_ascii), start=1)]
+
+    def _carregar_indice(self, indice):
+        for campo in ('offset', 'pointer_to_grouplist', 'verifica_group', 'pointer_to_pck_list',
+                      'verifica_pck', 'pck_mesh_list', 'pck_name_list'):
+            setattr(self, campo, indice[campo])
+        self.leitor.hash = indice['hash']
+        self.grupos = []
+        for registro in indice['grupos']:
+            grupo = Grupo(self, len(self.grupos) + 1, registro['nome'], registro['endereco'])
+            grupo._cabecalho = (registro['verifica_grupo'], registro['group_amount'], registro['group_pointer'])
+            grupo._entradas = [MeshEntry(grupo, i, dict(zip(('mesh_start', 'mesh_size', 'mesh_vtx_total',
+                                                             'mesh_end'), valores)))
+                               for i, valores in enumerate(registro['mesh_entries'], start=1)]
+            self.grupos.append(grupo)
+        self.pck_index = [grupo.endereco for grupo in self.grupos]
+        self.namelist_ascii = [grupo.nome for grupo in self.grupos]
+
+    def como_indice(self):
+        # Lê o cabeçalho e a tabela de mesh entries de todos os grupos
+        return {
+            'offset': self.offset, 'pointer_to_grouplist': self.pointer_to_grouplist,
+            'verifica_group': self.verifica_group, 'pointer_to_pck_list': self.pointer_to_pck_list,
+            'verifica_pck': self.verifica_pck, 'pck_mesh_list': self.pck_mesh_list,
+            'pck_name_list': self.pck_name_list, 'hash': self.leitor.hash_conteudo(),
+            'grupos': [{'nome': grupo.nome, 'endereco': grupo.endereco, 'verifica_grupo': grupo.verifica_grupo,
+                        'group_amount': grupo.group_amount, 'group_pointer': grupo.group_pointer,
+                        'mesh_entries': [[e.mesh_start, e.mesh_size, e.mesh_vtx_total, e.mesh_end]
+                                         for e in grupo.entradas]}
+                       for grupo in self.grupos],
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        if self.cache is not None:
+            self.cache.concluir()
+        if self._proprio_leitor:
+            self.leitor.fechar()
+
+    def __len__(self):
+        return len(self.grupos)
+
+    def __iter__(self):
+        return iter(self.grupos)
+
+    def __getitem__(self, indice):
+        return self.grupos[indice]
+
+    @property
+    def por_nome(self):
+        # nome -> índices (base 0) dos grupos com esse nome, montado no primeiro uso
+        if self._por_nome is None:
+            self._por_nome = {}
+            for i, nome in enumerate(self.namelist_ascii):
+                self._por_nome.setdefault(nome, []).append(i)
+        return self._por_nome
+
+class IndicePack:
+    # Índice persistente ao lado do pack (<pack>.mc3idx.json): cabeçalho, nome ->
+    # endereço no PCK_INDEX, cabeçalho de cada grupo, faixas das mesh entries e o
+    # hash do conteúdo. Vale enquanto tamanho e mtime do pack não mudarem.
+    VERSAO = 1
+    SUFIXO = ".mc3idx.json"
+
+    def __init__(self, caminho_pack):
+        self.caminho_pack = caminho_pack
+        self.caminho = caminho_pack + self.SUFIXO
+
+    def _identidade(self):
+        info = os.stat(self.caminho_pack)
+        return [info.st_size, info.st_mtime_ns]
+
+    def carregar(self):
+        # Devolve os dados do índice, ou None se não existir ou estiver desatualizado
+        try:
+            with open(self.caminho) as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if dados.get('versao') != self.VERSAO or dados.get('identidade') != self._identidade():
+            return None
+        return dados
+
+    def gravar(self, pack):
+        dados = dict(pack.como_indice(), versao=self.VERSAO, identidade=self._identidade())
+        gravar_atomico(self.caminho, lambda f: f.write(json.dumps(dados).encode('utf-8')))
+        return dados
+
+def abrir_pack_indexado(caminho, cache=None):
+    # Abre o pack pelo índice; se ele faltar ou estiver desatualizado, lê o pack
+    # inteiro uma vez e grava um índice novo
+    indice = IndicePack(caminho)
+    dados = indice.carregar()
+    if dados is not None:
+        return Pack(caminho, cache, indice=dados)
+    pack = Pack(caminho, cache)
+    try:
+        indice.gravar(pack)
+    except OSError as e:
+        print(Fore.YELLOW + f"Não foi possível gravar o índice '{indice.caminho}': {e}")
+    except SystemExit:
+        # Algum grupo é inválido (o erro já foi impresso); segue sem índice
+        print(Fore.YELLOW + f"Índice '{indice.caminho}' não gravado.")
+    return pack
+
+# ---------------------------
+# Escrita de OBJ direto dos arrays NumPy (sem passar pelo VTK)
+# ---------------------------
+LINHAS_POR_BLOCO = 65536
+
+def _formato_valor(array):
+    return '%d' if np.issubdtype(array.dtype, np.integer) else '%.9g'
+
+def _escrever_linhas(arquivo, modelo, array):
+    # Formata o array inteiro com um único '%' por bloco de linhas
+    array = np.asarray(array)
+    for inicio in range(0, len(array), LINHAS_POR_BLOCO):
+        bloco = array[inicio:inicio + LINHAS_POR_BLOCO]
+        arquivo.write((modelo * len(bloco)) % tuple(bloco.ravel().tolist()))
+
+def faces_vtk_para_indices(faces):
+    # [3, a, b, c] (formato de célula do VTK) -> array (n, 3) de índices
+    faces = np.asarray(faces)
+    if faces.size == 0:
+        return np.empty((0, 3), dtype=np.int64)
+    return faces.reshape(-1, 4)[:, 1:]
+
+def escrever_blocos_obj(arquivo, vertices, faces, uvs=None, normais=None, base=0):
+    # Escreve os blocos v/vt/vn/f em um arquivo já aberto. `faces` é (n, 3) com
+    # índices base 0 relativos a `vertices`; `base` é quantos vértices já foram
+    # escritos antes neste arquivo.
+    vertices = np.asarray(vertices).reshape(-1, 3)
+    fv = _formato_valor(vertices)
+    _escrever_linhas(arquivo, f"v {fv} {fv} {fv}\n", vertices)
+    if uvs is not None:
+        uvs = np.asarray(uvs).reshape(-1, 2)
+        fu = _formato_valor(uvs)
+        _escrever_linhas(arquivo, f"vt {fu} {fu}\n", uvs)
+    if normais is not None:
+        _escrever_linhas(arquivo, "vn %.6g %.6g %.6g\n", np.asarray(normais).reshape(-1, 3))
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3) + (base + 1)
+    if uvs is not None and normais is not None:
+        modelo, repeticoes = "f %d/%d/%d %d/%d/%d %d/%d/%d\n", 3
+    elif uvs is not None:
+        modelo, repeticoes = "f %d/%d %d/%d %d/%d\n", 2
+    elif normais is not None:
+        modelo, repeticoes = "f %d//%d %d//%d %d//%d\n", 2
+    else:
+        modelo, repeticoes = "f %d %d %d\n", 1
+    _escrever_linhas(arquivo, modelo, np.repeat(faces, repeticoes, axis=1))
+
+def escrever_mtl(caminho_mtl, material, textura=None):
+    with open(caminho_mtl, 'w', newline='\n') as f:
+        f.write(f"newmtl {material}\nKa 1 1 1\nKd 1 1 1\nKs 0 0 0\nd 1\nillum 1\n")
+        if textura:
+            f.write(f"map_Kd {textura}\n")
+
+@instrumentado("exportacao", _contagens_obj)
+def escrever_obj(caminho, vertices, faces, uvs=None, normais=None, material=None, textura=None):
+    # Grava um OBJ completo; com `material`, grava também o .mtl ao lado
+    with open(caminho, 'w', newline='\n', buffering=1 << 20) as f:
+        f.write("# midnightclub3-mesh-tool\n")
+        if material:
+            caminho_mtl = os.path.splitext(caminho)[0] + ".mtl"
+            f.write(f"mtllib {os.path.basename(caminho_mtl)}\nusemtl {material}\n")
+        escrever_blocos_obj(f, vertices, faces, uvs, normais)
+    if material:
+        escrever_mtl(caminho_mtl, material, textura)
+
+# ---------------------------
+# Formatos binários: PLY (little-endian) e glTF binário (GLB)
+# ---------------------------
+FORMATOS_EXPORTACAO = ("obj", "glb", "ply")
+
+def _tipo_ply(array):
+    # int16 (dados brutos do pack) é gravado como short; o resto como float
+    if array.dtype == np.int16:
+        return 'short', '<i2'
+    return 'float', '<f4'
+
+@instrumentado("exportacao", _contagens_obj)
+def escrever_ply(caminho, vertices, faces, uvs=None, normais=None):
+    vertices = np.asarray(vertices).reshape(-1, 3)
+    faces = np.asarray(faces).reshape(-1, 3)
+    nome_pos, tipo_pos = _tipo_ply(vertices)
+    campos = [('x', tipo_pos), ('y', tipo_pos), ('z', tipo_pos)]
+    propriedades = [f"property {nome_pos} {eixo}" for eixo in "xyz"]
+    if normais is not None:
+        campos += [('nx', '<f4'), ('ny', '<f4'), ('nz', '<f4')]
+        propriedades += [f"property float {eixo}" for eixo in ("nx", "ny", "nz")]
+    if uvs is not None:
+        uvs = np.asarray(uvs).reshape(-1, 2)
+        nome_uv, tipo_uv = _tipo_ply(uvs)
+        campos += [('s', tipo_uv), ('t', tipo_uv)]
+        propriedades += [f"property {nome_uv} s", f"property {nome_uv} t"]
+
+    registros = np.empty(len(vertices), dtype=campos)
+    for i, eixo in enumerate("xyz"):
+        registros[eixo] = vertices[:, i]
+    if normais is not None:
+        normais = np.asarray(normais).reshape(-1, 3)
+        for i, eixo in enumerate(("nx", "ny", "nz")):
+            registros[eixo] = normais[:, i]
+    if uvs is not None:
+        registros['s'] = uvs[:, 0]
+        registros['t'] = uvs[:, 1]
+    registros_faces = np.empty(len(faces), dtype=[('n', 'u1'), ('indices', '<u4', (3,))])
+    registros_faces['n'] = 3
+    registros_faces['indices'] = faces
+
+    cabecalho = "\n".join(["ply", "format binary_little_endian 1.0", "comment midnightclub3-mesh-tool",
+                           f"element vertex {len(vertices)}", *propriedades,
+                           f"element face {len(faces)}", "property list uchar uint vertex_indices",
+                           "end_header"]) + "\n"
+    with open(caminho, 'wb') as f:
+        f.write(cabecalho.encode('ascii'))
+        f.write(memoryview(registros).cast('B'))
+        f.write(memoryview(registros_faces).cast('B'))
+
+GLB_MAGIC = 0x46546C67      # "glTF"
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+GLTF_FLOAT = 5126
+GLTF_UINT = 5125
+GLTF_ARRAY_BUFFER = 34962
+GLTF_ELEMENT_ARRAY_BUFFER = 34963
+
+@instrumentado("exportacao", _contagens_glb)
+def escrever_glb(caminho, nos, material=None):
+    # `nos`: lista de (nome, vertices, faces, uvs, normais), um nó/mesh por item,
+    # todos no mesmo buffer binário. O V das UVs é invertido (1 - v) porque a
+    # origem da textura no glTF é o canto superior esquerdo, ao contrário do OBJ.
+    partes = []
+    tamanho = 0
+    buffer_views = []
+    accessors = []
+    meshes = []
+
+    def anexar(array, tipo, componente, alvo, limites=False):
+        nonlocal tamanho
+        array = np.ascontiguousarray(array)
+        preenchimento = -tamanho % 4
+        if preenchimento:
+            partes.append(bytes(preenchimento))
+            tamanho += preenchimento
+        buffer_views.append({'buffer': 0, 'byteOffset': tamanho, 'byteLength': array.nbytes, 'target': alvo})
+        partes.append(memoryview(array).cast('B'))
+        tamanho += array.nbytes
+        accessor = {'bufferView': len(buffer_views) - 1, 'componentType': componente,
+                    'count': len(array) if array.ndim > 1 else array.size, 'type': tipo}
+        if limites:
+            accessor['min'] = array.min(axis=0).tolist()
+            accessor['max'] = array.max(axis=0).tolist()
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    for nome, vertices, faces, uvs, normais in nos:
+        faces = np.asarray(faces).reshape(-1, 3)
+        if len(faces) == 0:
+            continue
+        atributos = {'POSITION': anexar(np.asarray(vertices, dtype=np.float32).reshape(-1, 3), 'VEC3',
+                                        GLTF_FLOAT, GLTF_ARRAY_BUFFER, limites=True)}
+        if normais is not None:
+            atributos['NORMAL'] = anexar(np.asarray(normais, dtype=np.float32).reshape(-1, 3), 'VEC3',
+                                         GLTF_FLOAT, GLTF_ARRAY_BUFFER)
+        if uvs is not None:
+            texcoords = np.asarray(uvs, dtype=np.float32).reshape(-1, 2).copy()
+            texcoords[:, 1] = 1.0 - texcoords[:, 1]
+            atributos['TEXCOORD_0'] = anexar(texcoords, 'VEC2', GLTF_FLOAT, GLTF_ARRAY_BUFFER)
+        primitiva = {'attributes': atributos,
+                     'indices': anexar(faces.astype(np.uint32).ravel(), 'SCALAR', GLTF_UINT,
+                                       GLTF_ELEMENT_ARRAY_BUFFER),
+                     'mode': 4}
+        if material:
+            primitiva['material'] = 0
+        meshes.append({'name': nome, 'primitives': [primitiva]})
+
+    documento = {
+        'asset': {'version': '2.0', 'generator': 'midnightclub3-mesh-tool'},
+        'scene': 0,
+        'scenes': [{'nodes': list(range(len(meshes)))}],
+        'nodes': [{'name': mesh['name'], 'mesh': i} for i, mesh in enumerate(meshes)],
+        'meshes': meshes,
+        'accessors': accessors,
+        'bufferViews': buffer_views,
+        'buffers': [{'byteLength': tamanho}],
+    }
+    if material:
+        documento['materials'] = [{'name': material}]
+    json_bytes = json.dumps(documento, separators=(',', ':')).encode('utf-8')
+    json_bytes += b' ' * (-len(json_bytes) % 4)
+    preenchimento_bin = bytes(-tamanho % 4)
+    tamanho_bin = tamanho + len(preenchimento_bin)
+    total = 12 + 8 + len(json_bytes) + 8 + tamanho_bin
+    with open(caminho, 'wb') as f:
+        f.write(struct.pack('<III', GLB_MAGIC, 2, total))
+        f.write(struct.pack('<II', len(json_bytes), GLB_CHUNK_JSON))
+        f.write(json_bytes)
+        f.write(struct.pack('<II', tamanho_bin, GLB_CHUNK_BIN))
+        for parte in partes:
+            f.write(parte)
+        f.write(preenchimento_bin)
+
+def escrever_malha(caminho, formato, vertices, faces, uvs=None, normais=None, material=None):
+    if formato == "glb":
+        nome = os.path.splitext(os.path.basename(caminho))[0]
+        escrever_glb(caminho, [(nome, vertices, faces, uvs, normais)], material)
+    elif formato == "ply":
+        escrever_ply(caminho, vertices, faces, uvs, normais)
+    else:
+        escrever_obj(caminho, vertices, faces, uvs, normais, material)
+
+@instrumentado("normais", lambda a, k, r: {'vertices': len(a[0]), 'faces': len(r[1])})
+def normais_vtk(vertices, faces):
+    # Normais suavizadas com orientação automática do VTK. A orientação pode
+    # inverter faces, então as faces resultantes também são devolvidas.
+    pv = carregar_pyvista()
+    faces = np.asarray(faces).reshape(-1, 3)
+    celulas = np.column_stack([np.full(len(faces), 3), faces]).ravel()
+    poly = pv.PolyData(np.asarray(vertices, dtype=np.float32), celulas)
+    poly.compute_normals(cell_normals=False, point_normals=True,
+                         auto_orient_normals=True, inplace=True)
+    return np.asarray(poly.point_normals), faces_vtk_para_indices(poly.faces)
+
+@instrumentado("normais", lambda a, k, r: {'vertices': len(a[0]), 'faces': len(a[1])})
+def normais_area(vertices, faces):
+    # Normais por vértice ponderadas pela área: o produto vetorial de cada face
+    # (módulo = 2 x área) é somado nos seus três vértices e depois normalizado.
+    # Não reorienta faces; vértices sem faces ficam com normal (0, 0, 0).
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    v0, v1, v2 = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+    normais_faces = np.cross(v1 - v0, v2 - v0)
+    normais = np.empty_like(vertices)
+    indices = faces.ravel()
+    for eixo in range(3):
+        normais[:, eixo] = np.bincount(indices, weights=np.repeat(normais_faces[:, eixo], 3),
+                                       minlength=len(vertices))
+    comprimentos = np.linalg.norm(normais, axis=1)
+    np.divide(normais, comprimentos[:, None], out=normais, where=comprimentos[:, None] > 0)
+    return normais
+
+def salvar_obj(export_name, vertices, faces, uvs=None, normais=True, material=None, formato="obj"):
+    # `normais`: True calcula com NumPy, "vtk" calcula e orienta via VTK,
+    # False omite, ou um array já calculado
+    try:
+        if isinstance(normais, str):
+            normais, faces = normais_vtk(vertices, faces)
+        elif normais is True:
+            normais = normais_area(vertices, faces)
+        elif normais is False:
+            normais = None
+        escrever_malha(export_name, formato, vertices, faces, uvs, normais, material)
+        print(Fore.GREEN + f"Mesh exportado com sucesso para '{export_name}'.")
+        return True
+    except Exception as e:
+        print(Fore.RED + f"Erro ao exportar {formato.upper()}: {e}")
+        return False
+
+# ---------------------------
+# Montagem da cena global (todas as mesh entries de um grupo)
+# ---------------------------
+class CenaGlobal:
+    # Todas as mesh entries de um grupo em arrays contíguos: vértices (N, 3),
+    # UVs (N, 2), faces (M, 3) e a cor (índice da mesh entry) de cada face. As
+    # normais de cada tipo (NumPy ou VTK) são calculadas no máximo uma vez; o
+    # PolyData da visualização também é reaproveitado pelas normais VTK.
+    # `limites_vertices`/`limites_faces` guardam o início de cada mesh entry
+    # (índice m - 1) e o total no fim.
+    __slots__ = ('vertices', 'uvs', 'faces', 'cores', 'limites_vertices', 'limites_faces', 'normais',
+                 '_normais_vtk', '_poly')
+
+    def __init__(self, vertices, uvs, faces, cores, limites_vertices, limites_faces):
+        self.vertices = vertices
+        self.uvs = uvs
+        self.faces = faces
+        self.cores = cores
+        self.limites_vertices = limites_vertices
+        self.limites_faces = limites_faces
+        self.normais = None
+        self._normais_vtk = False
+        self._poly = None
+
+    def partes(self):
+        # (índice da mesh entry, vértices, UVs, faces locais, normais) de cada
+        # mesh entry com ao menos uma face ativa
+        lv, lf = self.limites_vertices, self.limites_faces
+        for m_idx in range(1, len(lv)):
+            v0, v1, f0, f1 = lv[m_idx - 1], lv[m_idx], lf[m_idx - 1], lf[m_idx]
+            if f0 == f1:
+                continue
+            normais = self.normais[v0:v1] if self.normais is not None else None
+            yield m_idx, self.vertices[v0:v1], self.uvs[v0:v1], self.faces[f0:f1] - v0, normais
+
+    def poly(self):
+        # PolyData com as normais do VTK, para a visualização; não altera as
+        # normais nem as faces da cena, então exportar depois de visualizar
+        # grava o mesmo arquivo
+        if self._poly is None:
+            self._poly = construir_poly_global(self)
+        return self._poly
+
+    def calcular_normais(self, vtk=False):
+        # Por padrão, normais ponderadas por área (NumPy); com `vtk`, as do
+        # PolyData, com orientação automática. Essa orientação pode inverter
+        # faces, então as faces da cena passam a ser as do PolyData. Normais já
+        # calculadas só são reaproveitadas se forem do tipo pedido.
+        if self.normais is None or self._normais_vtk != vtk:
+            if vtk:
+                poly = self.poly()
+                self.normais = np.asarray(poly.point_normals)
+                self.faces = faces_vtk_para_indices(poly.faces)
+            else:
+                self.normais = normais_area(self.vertices, self.faces)
+            self._normais_vtk = vtk
+        return self.normais
+
+    def _entradas_vertices(self):
+        # Índice (base 0) da mesh entry de cada vértice
+        return np.repeat(np.arange(len(self.limites_vertices) - 1), np.diff(self.limites_vertices))
+
+    def _novos_limites(self, entradas_vertices, cores):
+        return (np.searchsorted(entradas_vertices, np.arange(len(self.limites_vertices))),
+                np.searchsorted(cores, np.arange(1, len(self.limites_faces) + 1)))
+
+    def soldar(self, passo=0):
+        # Solda vértices dentro de cada mesh entry, para que as faixas por mesh
+        # entry continuem contíguas; invalida normais já calculadas
+        entradas = self._entradas_vertices()
+        mantidos, self.faces, mantidas = soldar_vertices(self.vertices, self.uvs, self.faces, passo, entradas)
+        self.vertices = self.vertices[mantidos]
+        self.uvs = self.uvs[mantidos]
+        self.cores = self.cores[mantidas]
+        self.limites_vertices, self.limites_faces = self._novos_limites(entradas[mantidos], self.cores)
+        self.normais = None
+        self._poly = None
+        return self
+
+    def simplificar(self, tamanho_celula):
+        # Nova cena decimada em grade (células por mesh entry); esta fica intacta
+        entradas = self._entradas_vertices()
+        primeiros, vertices, uvs, faces, mantidas = simplificar_vertices(
+            self.vertices, self.uvs, self.faces, tamanho_celula, entradas)
+        cores = self.cores[mantidas]
+        return CenaGlobal(vertices, uvs, faces, cores, *self._novos_limites(entradas[primeiros], cores))
+
+@instrumentado("montagem_global", lambda a, k, r: {'vertices': len(r.vertices), 'faces': len(r.faces)})
+def montar_global(fonte, mesh_entries, offset, scale=False, dados_entradas=None, cache=None):
+    # 1ª passada: decodifica e conta vértices e faces ativas de cada strip;
+    # 2ª passada: preenche arrays alocados uma única vez com o tamanho final
+    contagens = []
+    with abrir_leitor(fonte) as leitor:
+        for m_idx, entry in enumerate(mesh_entries, start=1):
+            if dados_entradas is not None:
+                dados_internos = dados_entradas[m_idx - 1]
+            else:
+                dados_internos = processar_mesh_data(leitor, entry['mesh_start'], entry['mesh_end'], offset, cache=cache)
+            for strip in strips_de_dados(dados_internos):
+                num_faces = max(len(strip.vertices) - 2, 0)
+                mascara = mascara_flags(strip.flags, num_faces) if strip.flags is not None else None
+                ativas = num_faces if mascara is None else int(np.count_nonzero(mascara))
+                contagens.append((m_idx, strip, mascara, ativas))
+
+    total_vertices = sum(len(strip.vertices) for _, strip, _, _ in contagens)
+    total_faces = sum(ativas for _, _, _, ativas in contagens)
+    if scale:
+        tipo_vertices = tipo_uvs = np.float64
+    elif contagens:
+        tipo_vertices = np.result_type(*(strip.vertices.dtype for _, strip, _, _ in contagens))
+        tipo_uvs = np.result_type(*(strip.uvs.dtype for _, strip, _, _ in contagens))
+    else:
+        tipo_vertices = tipo_uvs = np.float64
+    vertices = np.empty((total_vertices, 3), dtype=tipo_vertices)
+    uvs = np.empty((total_vertices, 2), dtype=tipo_uvs)
+    faces = np.empty((total_faces, 3), dtype=np.int64)
+    cores = np.empty(total_faces, dtype=np.int32)
+    limites_vertices = np.zeros(len(mesh_entries) + 1, dtype=np.int64)
+    limites_faces = np.zeros(len(mesh_entries) + 1, dtype=np.int64)
+
+    v0 = f0 = 0
+    for m_idx, strip, mascara, ativas in contagens:
+        n = len(strip.vertices)
+        vertices[v0:v0 + n] = strip.vertices
+        uvs[v0:v0 + n] = strip.uvs
+        faces[f0:f0 + ativas] = faces_strip(n, mascara, base=v0)
+        cores[f0:f0 + ativas] = m_idx
+        v0 += n
+        f0 += ativas
+        limites_vertices[m_idx] = v0
+        limites_faces[m_idx] = f0
+    # Mesh entries sem strips herdam o limite da anterior
+    np.maximum.accumulate(limites_vertices, out=limites_vertices)
+    np.maximum.accumulate(limites_faces, out=limites_faces)
+    if scale:
+        vertices /= 256.0
+        uvs /= 256.0
+    return CenaGlobal(vertices, uvs, faces, cores, limites_vertices, limites_faces)
+
+# ---------------------------
+# Exportação global em streaming: uma mesh entry por vez na memória
+# ---------------------------
+def exportar_global_streaming(fonte, mesh_entries, offset, export_name, scale=False,
+                              dados_entradas=None, cache=None, material=None, solda=None, normais=True):
+    # Decodifica cada mesh entry e já grava seus blocos v/vt/vn/f com o
+    # deslocamento acumulado de vértices; o pico de memória fica limitado à maior
+    # mesh entry. As normais NumPy não cruzam mesh entries, então saem iguais às
+    # da exportação em memória; a orientação do VTK exigiria a cena inteira.
+    total_vertices = 0
+    total_faces = 0
+    try:
+        with abrir_leitor(fonte) as leitor, open(export_name, 'w', newline='\n', buffering=1 << 20) as f:
+            f.write("# midnightclub3-mesh-tool\n")
+            if material:
+                caminho_mtl = os.path.splitext(export_name)[0] + ".mtl"
+                f.write(f"mtllib {os.path.basename(caminho_mtl)}\nusemtl {material}\n")
+            for m_idx, entry in enumerate(mesh_entries, start=1):
+                dados = [dados_entradas[m_idx - 1]] if dados_entradas is not None else None
+                cena = montar_global(leitor, [entry], offset, scale=scale, dados_entradas=dados, cache=cache)
+                if solda is not None:
+                    cena.soldar(solda)
+                if not len(cena.vertices):
+                    continue
+                f.write(f"g Mesh{m_idx}\n")
+                escrever_blocos_obj(f, cena.vertices, cena.faces, cena.uvs,
+                                    cena.calcular_normais() if normais else None, base=total_vertices)
+                total_vertices += len(cena.vertices)
+                total_faces += len(cena.faces)
+        if material:
+            escrever_mtl(caminho_mtl, material)
+    except OSError as e:
+        print(Fore.RED + f"Erro ao exportar OBJ: {e}")
+        return False
+    if total_faces == 0:
+        os.remove(export_name)
+        print(Fore.RED + "Nenhuma face ativa encontrada para exportação.")
+        return False
+    print(Fore.GREEN + f"Mesh exportado com sucesso para '{export_name}'.")
+    return True
 
 # ---------------------------
 # Função para visualizar globalmente e exportar OBJ com smooth shading e cores para cada mesh
 # ---------------------------
-def visualizar_global(global_vertices, global_faces, global_uvs, global_face_colors, export_name=None):
-    poly = pv.PolyData(np.array(global_vertices), np.hstack(global_faces))
-    if global_uvs:
-        poly.active_texture_coordinates = np.array(global_uvs)
+def poly_da_cena(cena):
+    # PolyData só com os vértices e triângulos da cena
+    pv = carregar_pyvista()
+    celulas = np.column_stack([np.full(len(cena.faces), 3, dtype=np.int64), cena.faces]).ravel()
+    return pv.PolyData(np.asarray(cena.vertices, dtype=np.float32), celulas)
+
+@instrumentado("normais", lambda a, k, r: {'vertices': r.n_points, 'faces': r.n_cells})
+def construir_poly_global(cena):
+    poly = poly_da_cena(cena)
+    if len(cena.uvs):
+        poly.active_texture_coordinates = np.asarray(cena.uvs)
     poly.compute_normals(cell_normals=False, point_normals=True,
                          auto_orient_normals=True, inplace=True)
+    return poly
+
+def exportar_global(cena, export_name, normais=True, material=None, formato="obj"):
+    # Reaproveita as normais da cena se já foram calculadas do tipo pedido
+    try:
+        if normais is True or isinstance(normais, str):
+            normais = cena.calcular_normais(vtk=normais == "vtk")
+        if formato == "glb":
+            # Um nó por mesh entry, todos no mesmo buffer
+            escrever_glb(export_name, [(f"Mesh{m_idx}", v, f, u, n if normais is not False else None)
+                                       for m_idx, v, u, f, n in cena.partes()], material)
+            print(Fore.GREEN + f"Mesh exportado com sucesso para '{export_name}'.")
+            return True
+    except Exception as e:
+        print(Fore.RED + f"Erro ao exportar {formato.upper()}: {e}")
+        return False
+    uvs = cena.uvs if len(cena.uvs) else None
+    return salvar_obj(export_name, cena.vertices, cena.faces, uvs, normais, material, formato)
+
+def visualizar_global(cena, export_name=None, material=None, formato="obj", previa=None, normais=True):
+    # Com `previa` (tamanho de célula), mostra uma versão decimada; a exportação
+    # continua usando a cena completa
+    pv = carregar_pyvista()
+    vista = cena.simplificar(previa) if previa else cena
     pl = pv.Plotter(title="Visualização Global de Meshes")
     # Removido show_edges para desativar as bordas
-    pl.add_mesh(poly, scalars=np.array(global_face_colors), cmap="tab20", smooth_shading=True)
+    pl.add_mesh(vista.poly(), scalars=vista.cores, cmap="tab20", smooth_shading=True)
     pl.add_axes()
     pl.show()
     if export_name:
+        exportar_global(cena, export_name, normais=normais, material=material, formato=formato)
+
+# ---------------------------
+# Miniaturas PNG renderizadas fora da tela
+# ---------------------------
+CAMERAS_MINIATURA = {'iso': None, 'frente': 'xz', 'topo': 'xy', 'lado': 'yz'}
+
+class RenderizadorMiniaturas:
+    # Um único Plotter off_screen (e sua janela de renderização) reaproveitado
+    # para todas as miniaturas; entre uma cena e outra só os atores são trocados.
+    # As cores seguem o tab20 por mesh entry da visualização global, e com
+    # `por_entrada` cada mesh entry mantém a cor que tem na miniatura do grupo.
+    def __init__(self, tamanho=256, cameras=("iso",), por_entrada=False, previa=None):
+        self.tamanho = tamanho
+        self.cameras = tuple(cameras)
+        self.por_entrada = por_entrada
+        self.previa = previa
+        self.geradas = 0
+        self._pl = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _plotter(self):
+        if self._pl is None:
+            pv = carregar_pyvista()
+            self._pl = pv.Plotter(off_screen=True, window_size=(self.tamanho, self.tamanho))
+        return self._pl
+
+    def _renderizar(self, cena, prefixo, clim):
+        # Normais NumPy (ponderadas por área) em vez do compute_normals do VTK com
+        # orientação automática, caro demais para milhares de miniaturas; o
+        # sombreamento Gouraud usa essas normais direto. clear_actors preserva
+        # as luzes e a câmera do renderizador.
+        pl = self._plotter()
+        pl.clear_actors()
+        poly = poly_da_cena(cena)
+        poly.point_data.active_normals = np.asarray(cena.calcular_normais(), dtype=np.float32)
+        ator = pl.add_mesh(poly, scalars=cena.cores, cmap="tab20", clim=clim, show_scalar_bar=False)
+        ator.GetProperty().SetInterpolationToGouraud()
+        for camera in self.cameras:
+            vista = CAMERAS_MINIATURA[camera]
+            if vista is None:
+                pl.view_isometric()
+            else:
+                pl.camera_position = vista
+            pl.reset_camera()
+            pl.screenshot(f"{prefixo}_{camera}.png" if len(self.cameras) > 1 else f"{prefixo}.png")
+            self.geradas += 1
+
+    def renderizar(self, cena, diretorio, nome):
+        if not len(cena.faces):
+            print(Fore.RED + f"{nome}: nenhuma face ativa para a miniatura.")
+            return False
         try:
-            poly.save(export_name)
-            print(Fore.GREEN + f"Mesh exportado com sucesso para '{export_name}'.")
+            os.makedirs(diretorio, exist_ok=True)
+            if self.previa:
+                cena = cena.simplificar(self.previa)
+            clim = (int(cena.cores.min()), int(cena.cores.max()))
+            if not self.por_entrada:
+                self._renderizar(cena, os.path.join(diretorio, nome), clim)
+                return True
+            cena.calcular_normais()
+            for m_idx, v, u, f, n in cena.partes():
+                parte = CenaGlobal(v, u, f, np.full(len(f), m_idx, dtype=cena.cores.dtype),
+                                   np.array([0, len(v)]), np.array([0, len(f)]))
+                parte.normais = n
+                self._renderizar(parte, os.path.join(diretorio, f"{nome}_Mesh{m_idx}"), clim)
         except Exception as e:
-            print(Fore.RED + f"Erro ao exportar OBJ: {e}")
+            print(Fore.RED + f"Erro ao renderizar a miniatura de '{nome}': {e}")
+            return False
+        return True
+
+    def fechar(self):
+        if self._pl is not None:
+            self._pl.close()
+            self._pl = None
 
 # ---------------------------
 # Função para exportar individualmente OBJ para cada grupo de cada mesh
 # ---------------------------
-def exportar_individualmente(caminho, mesh_entries, offset, export_dir, scale=False):
+class FilaEscrita:
+    # Grava arquivos em um pool de threads enquanto o chamador segue decodificando.
+    # No máximo `limite` gravações ficam pendentes (quem envia espera pela mais
+    # antiga), e as mensagens saem na ordem de envio. Com um escritor, grava na hora.
+    def __init__(self, escritores=1, limite=None):
+        self._pool = ThreadPoolExecutor(escritores, thread_name_prefix="escrita") if escritores > 1 else None
+        self._limite = limite or 2 * escritores
+        self._pendentes = deque()
+        self.concluidos = 0
+        self.falhas = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def enviar(self, caminho, funcao, *args):
+        if self._pool is None:
+            try:
+                funcao(*args)
+            except Exception as e:
+                self._relatar(caminho, e)
+            else:
+                self._relatar(caminho, None)
+            return
+        while len(self._pendentes) >= self._limite:
+            self._concluir_mais_antiga()
+        self._pendentes.append((caminho, self._pool.submit(funcao, *args)))
+
+    def _concluir_mais_antiga(self):
+        caminho, futuro = self._pendentes.popleft()
+        self._relatar(caminho, futuro.exception())
+
+    def _relatar(self, caminho, erro):
+        if erro is None:
+            print(Fore.GREEN + f"Exportado: {caminho}")
+            self.concluidos += 1
+        else:
+            print(Fore.RED + f"Erro ao exportar {caminho}: {erro}")
+            self.falhas.append(caminho)
+
+    def fechar(self):
+        while self._pendentes:
+            self._concluir_mais_antiga()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+class ManifestoExportacao:
+    # manifesto.json no diretório da exportação individual: o hash dos bytes de
+    # cada mesh entry (mesh_start..mesh_end), os arquivos gerados a partir dela e
+    # os parâmetros de saída. Com os mesmos parâmetros, uma mesh entry de mesmo
+    # hash cujos arquivos ainda existem não é decodificada nem regravada.
+    ARQUIVO = "manifesto.json"
+    VERSAO = 1
+
+    def __init__(self, diretorio, parametros):
+        self.diretorio = diretorio
+        self.parametros = parametros
+        self.caminho = os.path.join(diretorio, self.ARQUIVO)
+        try:
+            with open(self.caminho) as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            dados = {}
+        self.valido = dados.get('versao') == self.VERSAO and dados.get('parametros') == parametros
+        self.anterior = dados.get('entradas', {})
+        self.atual = {}
+        self.inalteradas = 0
+
+    @staticmethod
+    def hash_entrada(leitor, entry):
+        with leitor.fatia(entry['mesh_start'], entry['mesh_end']) as chunk:
+            return hashlib.blake2b(chunk, digest_size=16).hexdigest()
+
+    @staticmethod
+    def parametros_exportacao(scale, formato, normais, material, solda):
+        return {'scale': scale, 'formato': formato, 'normais': normais, 'material': material, 'solda': solda}
+
+    def inalterada(self, me_idx, hash_entrada):
+        # Se a mesh entry pode ser pulada, sem alterar o manifesto
+        registro = self.anterior.get(str(me_idx))
+        return (self.valido and registro is not None and registro['hash'] == hash_entrada
+                and all(os.path.exists(os.path.join(self.diretorio, a)) for a in registro['arquivos']))
+
+    def reaproveitar(self, me_idx, hash_entrada):
+        # Mantém o registro anterior se nada mudou; devolve se a mesh entry pode ser pulada
+        if not self.inalterada(me_idx, hash_entrada):
+            return False
+        self.atual[str(me_idx)] = self.anterior[str(me_idx)]
+        self.inalteradas += 1
+        return True
+
+    def registrar(self, me_idx, hash_entrada, arquivos):
+        self.atual[str(me_idx)] = {'hash': hash_entrada, 'arquivos': arquivos}
+
+    def concluir(self, falhas=()):
+        # Mesh entries com alguma gravação falha ficam fora do manifesto (serão
+        # refeitas); arquivos do manifesto anterior que não foram gerados de novo
+        # são removidos
+        falhas = {os.path.basename(caminho) for caminho in falhas}
+        for chave, registro in list(self.atual.items()):
+            if falhas.intersection(registro['arquivos']):
+                del self.atual[chave]
+        gerados = {arquivo for registro in self.atual.values() for arquivo in registro['arquivos']}
+        removidos = 0
+        for registro in self.anterior.values():
+            for arquivo in registro['arquivos']:
+                caminho = os.path.join(self.diretorio, arquivo)
+                if arquivo not in gerados and arquivo not in falhas and os.path.exists(caminho):
+                    os.remove(caminho)
+                    removidos += 1
+        dados = {'versao': self.VERSAO, 'parametros': self.parametros, 'entradas': self.atual}
+        gravar_atomico(self.caminho, lambda f: f.write(json.dumps(dados, indent=1).encode('utf-8')))
+        return removidos
+
+def exportar_individualmente(fonte, mesh_entries, offset, export_dir, scale=False, dados_entradas=None,
+                             normais=True, material=None, cache=None, formato="obj", solda=None,
+                             escritores=1, incremental=False):
+    # A decodificação, as faces e as normais ficam nesta thread; a gravação de
+    # cada arquivo vai para a FilaEscrita. Com `incremental`, um manifesto no
+    # diretório permite pular as mesh entries inalteradas.
     if not os.path.exists(export_dir):
         os.makedirs(export_dir)
-    count_export = 0
-    for me_idx, entry in enumerate(mesh_entries, start=1):
-        ms = entry['mesh_start']
-        me = entry['mesh_end']
-        dados_internos = processar_mesh_data(caminho, ms, me, offset)
-        # Cada mesh entry terá sua própria cor (usando seu índice)
-        for padrao, key_verts, key_uvs, key_fflags in [(1, 'vertices1_groups', 'uvs1_groups', 'fflags1_groups'),
-                                                       (2, 'vertices2_groups', 'uvs2_groups', 'fflags2_groups')]:
-            verts_groups = dados_internos.get(key_verts, [])
-            uv_groups = dados_internos.get(key_uvs, [])
-            fflags_groups = dados_internos.get(key_fflags, [])
-            for gi, group in enumerate(verts_groups, start=1):
-                verts = group['vertices']
-                if scale:
-                    verts = scale_vertices(verts)
-                if gi - 1 < len(uv_groups):
-                    uvs = uv_groups[gi - 1]['uvs']
-                    if scale:
-                        uvs = scale_uvs(uvs)
-                    if len(uvs) != len(verts):
-                        uvs = uvs + [(0,0)]*(len(verts)-len(uvs))
-                else:
-                    uvs = [(0,0)] * len(verts)
-                if gi - 1 < len(fflags_groups):
-                    flags = fflags_groups[gi - 1]['flags']
-                else:
-                    flags = ["ativado"] * max(len(verts)-2, 0)
-                faces, face_status = gerar_faces(verts, flags)
-                active_faces = []
-                for i, face in enumerate(faces):
-                    if face_status[i] == 1:
-                        active_faces.append(face)
-                if not active_faces:
+    manifesto = None
+    if incremental:
+        manifesto = ManifestoExportacao(export_dir, ManifestoExportacao.parametros_exportacao(
+            scale, formato, normais, material, solda))
+    falhas = []
+    with abrir_leitor(fonte) as leitor, FilaEscrita(escritores) as fila:
+        for me_idx, entry in enumerate(mesh_entries, start=1):
+            if manifesto is not None:
+                hash_entrada = manifesto.hash_entrada(leitor, entry)
+                if manifesto.reaproveitar(me_idx, hash_entrada):
                     continue
-                poly = pv.PolyData(np.array(verts), np.hstack(active_faces))
-                poly.active_texture_coordinates = np.array(uvs)
-                poly.compute_normals(cell_normals=False, point_normals=True,
-                                     auto_orient_normals=True, inplace=True)
-                filename = os.path.join(export_dir, f"Mesh{me_idx}_Padrao{padrao}_Grupo{gi}.obj")
+            arquivos = []
+            # Com -j, entradas que o manifesto já pulava chegam como None
+            dados_internos = dados_entradas[me_idx - 1] if dados_entradas is not None else None
+            if dados_internos is None:
+                dados_internos = processar_mesh_data(leitor, entry['mesh_start'], entry['mesh_end'], offset, cache=cache)
+            for strip in strips_de_dados(dados_internos):
+                faces_ativas = strip.faces()
+                if len(faces_ativas) == 0:
+                    continue
+                verts, uvs = strip.vertices, strip.uvs
+                if scale:
+                    verts, uvs = scale_vertices(verts), scale_uvs(uvs)
+                if solda is not None:
+                    mantidos, faces_ativas, _ = soldar_vertices(verts, uvs, faces_ativas, solda)
+                    if len(faces_ativas) == 0:
+                        continue
+                    verts, uvs = verts[mantidos], uvs[mantidos]
+                filename = os.path.join(export_dir,
+                                        f"Mesh{me_idx}_Padrao{strip.padrao}_Grupo{strip.indice}.{formato}")
                 try:
-                    poly.save(filename)
-                    print(Fore.GREEN + f"Exportado: {filename}")
-                    count_export += 1
+                    normais_strip = None
+                    if normais == "vtk":
+                        normais_strip, faces_ativas = normais_vtk(verts, faces_ativas)
+                    elif normais:
+                        normais_strip = normais_area(verts, faces_ativas)
                 except Exception as e:
                     print(Fore.RED + f"Erro ao exportar {filename}: {e}")
-    if count_export == 0:
+                    falhas.append(filename)
+                    continue
+                fila.enviar(filename, escrever_malha, filename, formato, verts, faces_ativas, uvs,
+                            normais_strip, material)
+                arquivos.append(os.path.basename(filename))
+                if material and formato == "obj":
+                    arquivos.append(os.path.splitext(arquivos[-1])[0] + ".mtl")
+            if manifesto is not None:
+                manifesto.registrar(me_idx, hash_entrada, arquivos)
+    if manifesto is not None:
+        removidos = manifesto.concluir(falhas + fila.falhas)
+        print(Fore.CYAN + f"Incremental: {manifesto.inalteradas} mesh entries inalteradas, "
+                          f"{removidos} arquivo(s) obsoleto(s) removido(s).")
+        if manifesto.inalteradas:
+            return
+    if fila.concluidos == 0:
         print(Fore.RED + "Nenhum OBJ individual foi gerado.")
 
 # ---------------------------
@@ -488,9 +2216,18 @@ def exportar_individualmente(caminho, mesh_entries, offset, export_dir, scale=Fa
 def main():
     print(Fore.CYAN + Style.BRIGHT + "Selecione o arquivo para processamento:")
     caminho = escolher_arquivo()
+    try:
+        leitor = LeitorPack(caminho)
+    except (OSError, ValueError) as e:
+        print(Fore.RED + f"Erro ao abrir ou processar o arquivo: {e}")
+        sys.exit(1)
+    with leitor:
+        menu_grupo(leitor)
+
+def menu_grupo(leitor):
     (offset, pointer_group, dados_group, verifica_group,
      pointer_to_pck_list, pck_amount, dados_verificacao_pck, verifica_pck,
-     pck_mesh_list, pck_name_list, pck_index, namelist_ascii) = processar_arquivo(caminho)
+     pck_mesh_list, pck_name_list, pck_index, namelist_ascii) = processar_arquivo(leitor)
     
     print(Fore.CYAN + Style.BRIGHT + "\nLista Agrupada (PCK_INDEX com NAMELIST):")
     for i, (idx_val, name_str) in enumerate(zip(pck_index, namelist_ascii), start=1):
@@ -511,7 +2248,7 @@ def main():
     export_name_global = f"{nome_grupo_sanitizado}.obj"
     
     group_addr = pck_index[grupo_selecionado - 1]
-    verifica_grupo_sel, group_amount, group_pointer = processar_grupo(caminho, group_addr, offset)
+    verifica_grupo_sel, group_amount, group_pointer = processar_grupo(leitor, group_addr, offset)
     group_verify_str = "98 0F 7A 00" if verifica_grupo_sel else "Sequência diferente de 98 0F 7A 00"
     print(Fore.GREEN + Style.BRIGHT + "\nGrupo Selecionado:")
     print(Fore.GREEN + Style.BRIGHT + f"Endereço do Grupo: 0x{group_addr:08X}")
@@ -519,11 +2256,11 @@ def main():
     print(Fore.GREEN + Style.BRIGHT + f"Group Amount: {group_amount}")
     print(Fore.GREEN + Style.BRIGHT + f"Group Pointer: 0x{group_pointer:08X}")
     
-    meshgroup = processar_meshgroup(caminho, group_pointer, group_amount, offset)
+    meshgroup = processar_meshgroup(leitor, group_pointer, group_amount, offset)
     meshgroup_str = [f"0x{valor:08X}" for valor in meshgroup]
     print(Fore.GREEN + Style.BRIGHT + f"\nMeshgroup: {meshgroup_str}")
     
-    mesh_entries = processar_mesh_entries(caminho, meshgroup, offset)
+    mesh_entries = processar_mesh_entries(leitor, meshgroup, offset)
     print(Fore.CYAN + Style.BRIGHT + "\nDetalhes das Entradas de Mesh:")
     for idx, entry in enumerate(mesh_entries, start=1):
         print(Fore.YELLOW + Style.BRIGHT +
@@ -541,165 +2278,399 @@ def main():
     print("6. Gerar OBJ individualmente com vértices e UVs divididos por 256")
     opcao = input(Fore.YELLOW + "Digite sua opção (1, 2, 3, 4, 5 ou 6): ")
     
-    # Para visualização global, vamos criar um vetor de cores, onde cada mesh entry recebe uma cor única.
-    global_face_colors = []
-    
-    if opcao == "1":
-        global_vertices = []
-        global_uvs = []
-        global_faces = []
-        vert_offset = 0
-        # Para cada mesh entry, use seu índice (iniciando em 1) para a cor
-        for m_idx, entry in enumerate(mesh_entries, start=1):
-            mesh_color = m_idx  # Cor atribuída a toda a mesh entry
-            ms = entry['mesh_start']
-            me = entry['mesh_end']
-            dados_internos = processar_mesh_data(caminho, ms, me, offset)
-            for padrao, key_verts, key_uvs, key_fflags in [(1, 'vertices1_groups', 'uvs1_groups', 'fflags1_groups'),
-                                                           (2, 'vertices2_groups', 'uvs2_groups', 'fflags2_groups')]:
-                verts_groups = dados_internos.get(key_verts, [])
-                uv_groups = dados_internos.get(key_uvs, [])
-                fflags_groups = dados_internos.get(key_fflags, [])
-                for gi, group in enumerate(verts_groups):
-                    verts = group['vertices']
-                    if gi < len(uv_groups):
-                        uvs = uv_groups[gi]['uvs']
-                        if len(uvs) != len(verts):
-                            uvs = uvs + [(0,0)]*(len(verts)-len(uvs))
-                    else:
-                        uvs = [(0,0)] * len(verts)
-                    if gi < len(fflags_groups):
-                        flags = fflags_groups[gi]['flags']
-                    else:
-                        flags = ["ativado"] * max(len(verts)-2, 0)
-                    faces, face_status = gerar_faces(verts, flags)
-                    for i, face in enumerate(faces):
-                        if face_status[i] == 1:
-                            global_faces.append([face[0], face[1] + vert_offset,
-                                                   face[2] + vert_offset, face[3] + vert_offset])
-                            global_face_colors.append(mesh_color)
-                    global_vertices.extend(verts)
-                    global_uvs.extend(uvs)
-                    vert_offset = len(global_vertices)
-        if not global_vertices or not global_faces:
-            print(Fore.RED + "Nenhuma face ativa encontrada para exportação.")
+    if opcao in ("1", "4", "5"):
+        cena = montar_global(leitor, mesh_entries, offset, scale=(opcao == "5"))
+        if not len(cena.faces):
+            alvo = "visualização" if opcao == "4" else "exportação"
+            print(Fore.RED + f"Nenhuma face ativa encontrada para {alvo}.")
             sys.exit(1)
-        export_name = export_name_global
-        global_faces_flat = np.hstack(global_faces)
-        poly = pv.PolyData(np.array(global_vertices), global_faces_flat)
-        if global_uvs:
-            poly.active_texture_coordinates = np.array(global_uvs)
-        poly.compute_normals(cell_normals=False, point_normals=True,
-                             auto_orient_normals=True, inplace=True)
-        visualizar_global(global_vertices, global_faces, global_uvs, global_face_colors, export_name)
+        export_name = {"1": export_name_global, "4": None, "5": f"{nome_grupo_sanitizado}_scaled.obj"}[opcao]
+        previa = None
+        if opcao == "4":
+            resposta = input(Fore.YELLOW + "Tamanho de célula da prévia decimada (Enter = resolução completa): ")
+            try:
+                previa = float(resposta) if resposta.strip() else None
+            except ValueError:
+                print(Fore.RED + "Entrada inválida. Por favor, digite um número.")
+                sys.exit(1)
+        visualizar_global(cena, export_name, previa=previa)
     elif opcao == "2":
         export_dir = f"{nome_grupo_sanitizado}_individual_objs"
-        exportar_individualmente(caminho, mesh_entries, offset, export_dir, scale=False)
+        exportar_individualmente(leitor, mesh_entries, offset, export_dir, scale=False)
     elif opcao == "3":
         print(Fore.CYAN + "Nenhum OBJ foi gerado.")
-    elif opcao == "4":
-        global_vertices = []
-        global_uvs = []
-        global_faces = []
-        vert_offset = 0
-        global_face_colors = []
-        for m_idx, entry in enumerate(mesh_entries, start=1):
-            mesh_color = m_idx
-            ms = entry['mesh_start']
-            me = entry['mesh_end']
-            dados_internos = processar_mesh_data(caminho, ms, me, offset)
-            for padrao, key_verts, key_uvs, key_fflags in [(1, 'vertices1_groups', 'uvs1_groups', 'fflags1_groups'),
-                                                           (2, 'vertices2_groups', 'uvs2_groups', 'fflags2_groups')]:
-                verts_groups = dados_internos.get(key_verts, [])
-                uv_groups = dados_internos.get(key_uvs, [])
-                fflags_groups = dados_internos.get(key_fflags, [])
-                for gi, group in enumerate(verts_groups):
-                    verts = group['vertices']
-                    if gi < len(uv_groups):
-                        uvs = uv_groups[gi]['uvs']
-                        if len(uvs) != len(verts):
-                            uvs = uvs + [(0,0)]*(len(verts)-len(uvs))
-                    else:
-                        uvs = [(0,0)] * len(verts)
-                    if gi < len(fflags_groups):
-                        flags = fflags_groups[gi]['flags']
-                    else:
-                        flags = ["ativado"] * max(len(verts)-2, 0)
-                    faces, face_status = gerar_faces(verts, flags)
-                    for i, face in enumerate(faces):
-                        if face_status[i] == 1:
-                            global_faces.append([face[0], face[1] + vert_offset,
-                                                   face[2] + vert_offset, face[3] + vert_offset])
-                            global_face_colors.append(mesh_color)
-                    global_vertices.extend(verts)
-                    global_uvs.extend(uvs)
-                    vert_offset = len(global_vertices)
-        if not global_vertices or not global_faces:
-            print(Fore.RED + "Nenhuma face ativa encontrada para visualização.")
-            sys.exit(1)
-        global_faces_flat = np.hstack(global_faces)
-        poly = pv.PolyData(np.array(global_vertices), global_faces_flat)
-        if global_uvs:
-            poly.active_texture_coordinates = np.array(global_uvs)
-        poly.compute_normals(cell_normals=False, point_normals=True,
-                             auto_orient_normals=True, inplace=True)
-        visualizar_global(global_vertices, global_faces, global_uvs, global_face_colors, None)
-    elif opcao == "5":
-        global_vertices = []
-        global_uvs = []
-        global_faces = []
-        vert_offset = 0
-        global_face_colors = []
-        for m_idx, entry in enumerate(mesh_entries, start=1):
-            mesh_color = m_idx
-            ms = entry['mesh_start']
-            me = entry['mesh_end']
-            dados_internos = processar_mesh_data(caminho, ms, me, offset)
-            for padrao, key_verts, key_uvs, key_fflags in [(1, 'vertices1_groups', 'uvs1_groups', 'fflags1_groups'),
-                                                           (2, 'vertices2_groups', 'uvs2_groups', 'fflags2_groups')]:
-                verts_groups = dados_internos.get(key_verts, [])
-                uv_groups = dados_internos.get(key_uvs, [])
-                fflags_groups = dados_internos.get(key_fflags, [])
-                for gi, group in enumerate(verts_groups):
-                    mesh_color_inner = mesh_color  # usa a mesma cor para toda a mesh
-                    verts = group['vertices']
-                    verts = scale_vertices(verts)
-                    if gi < len(uv_groups):
-                        uvs = uv_groups[gi]['uvs']
-                        uvs = scale_uvs(uvs)
-                        if len(uvs) != len(verts):
-                            uvs = uvs + [(0,0)]*(len(verts)-len(uvs))
-                    else:
-                        uvs = [(0,0)] * len(verts)
-                    if gi < len(fflags_groups):
-                        flags = fflags_groups[gi]['flags']
-                    else:
-                        flags = ["ativado"] * max(len(verts)-2, 0)
-                    faces, face_status = gerar_faces(verts, flags)
-                    for i, face in enumerate(faces):
-                        if face_status[i] == 1:
-                            global_faces.append([face[0], face[1] + vert_offset,
-                                                   face[2] + vert_offset, face[3] + vert_offset])
-                            global_face_colors.append(mesh_color_inner)
-                    global_vertices.extend(verts)
-                    global_uvs.extend(uvs)
-                    vert_offset = len(global_vertices)
-        if not global_vertices or not global_faces:
-            print(Fore.RED + "Nenhuma face ativa encontrada para exportação.")
-            sys.exit(1)
-        export_name = f"{nome_grupo_sanitizado}_scaled.obj"
-        global_faces_flat = np.hstack(global_faces)
-        poly = pv.PolyData(np.array(global_vertices), global_faces_flat)
-        if global_uvs:
-            poly.active_texture_coordinates = np.array(global_uvs)
-        poly.compute_normals(cell_normals=False, point_normals=True,
-                             auto_orient_normals=True, inplace=True)
-        visualizar_global(global_vertices, global_faces, global_uvs, global_face_colors, export_name)
     elif opcao == "6":
         export_dir = f"{nome_grupo_sanitizado}_individual_objs_scaled"
-        exportar_individualmente(caminho, mesh_entries, offset, export_dir, scale=True)
+        exportar_individualmente(leitor, mesh_entries, offset, export_dir, scale=True)
     else:
         print(Fore.RED + "Opção inválida.")
 
+# ---------------------------
+# Modo em lote (sem interação): argparse
+# ---------------------------
+def expandir_entradas(entradas, recursivo=False):
+    # Aceita arquivos, padrões glob e diretórios; devolve caminhos de arquivo sem repetição
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            if recursivo:
+                for raiz, _, nomes in os.walk(entrada):
+                    arquivos.extend(os.path.join(raiz, nome) for nome in sorted(nomes))
+            else:
+                arquivos.extend(os.path.join(entrada, nome) for nome in sorted(listar_arquivos(entrada)))
+        elif os.path.isfile(entrada):
+            arquivos.append(entrada)
+        else:
+            encontrados = sorted(c for c in glob.glob(entrada, recursive=recursivo) if os.path.isfile(c))
+            if not encontrados:
+                print(Fore.RED + f"Nenhum arquivo corresponde a '{entrada}'.")
+            arquivos.extend(encontrados)
+    # Os índices gravados ao lado dos packs (--indice) não são entradas
+    vistos = set()
+    return [a for a in arquivos
+            if not (a.endswith(IndicePack.SUFIXO) or a in vistos or vistos.add(a))]
+
+def compilar_seletores(seletores):
+    # Troca os seletores "re:<regex>" pelo padrão compilado (uma vez por execução,
+    # não por pack); um regex inválido levanta re.error
+    return [re.compile(s[3:]) if isinstance(s, str) and s.startswith("re:") else s
+            for s in seletores or ()]
+
+def selecionar_grupos(seletores, namelist_ascii, por_nome=None):
+    # Seletores: "all"/"todos", número (1 = primeiro grupo, como no menu),
+    # intervalo "3-7", "re:<regex>" (ou o padrão já compilado por
+    # compilar_seletores) ou nome exato. Devolve índices base 0 em ordem.
+    # `por_nome` (Pack.por_nome) evita percorrer a lista a cada nome exato.
+    if not seletores:
+        seletores = ["all"]
+    escolhidos = set()
+    for seletor in compilar_seletores(seletores):
+        if isinstance(seletor, re.Pattern):
+            escolhidos.update(i for i, nome in enumerate(namelist_ascii) if seletor.search(nome))
+        elif seletor.lower() in ("all", "todos"):
+            escolhidos.update(range(len(namelist_ascii)))
+        elif re.fullmatch(r"\d+", seletor):
+            indice = int(seletor) - 1
+            if 0 <= indice < len(namelist_ascii):
+                escolhidos.add(indice)
+            else:
+                print(Fore.RED + f"Número de grupo inválido: {seletor}")
+        elif re.fullmatch(r"\d+-\d+", seletor):
+            inicio, fim = (int(v) for v in seletor.split("-"))
+            escolhidos.update(i for i in range(inicio - 1, fim) if 0 <= i < len(namelist_ascii))
+        elif por_nome is not None:
+            escolhidos.update(por_nome.get(seletor, ()))
+        else:
+            escolhidos.update(i for i, nome in enumerate(namelist_ascii) if nome == seletor)
+    return sorted(escolhidos)
+
+def diretorio_individual(diretorio, nome_saida, scale=False):
+    return os.path.join(diretorio, nome_saida + ("_individual_objs_scaled" if scale else "_individual_objs"))
+
+def exportar_grupo_lote(leitor, offset, nome_saida, opcao, diretorio, mesh_entries,
+                        dados_entradas=None, visualizar=False, normais=True, material=None, cache=None,
+                        streaming=False, formato="obj", solda=None, escritores=1, incremental=False,
+                        lods=None, previa=None):
+    scale = opcao in ("5", "6")
+    if opcao in ("2", "6"):
+        exportar_individualmente(leitor, mesh_entries, offset,
+                                 diretorio_individual(diretorio, nome_saida, scale), scale=scale,
+                                 dados_entradas=dados_entradas, normais=normais, material=material,
+                                 cache=cache, formato=formato, solda=solda, escritores=escritores,
+                                 incremental=incremental)
+        return True
+    export_name = os.path.join(diretorio, f"{nome_saida}_scaled.{formato}" if scale else f"{nome_saida}.{formato}")
+    if streaming and not visualizar and opcao != "4" and formato == "obj" and normais != "vtk":
+        return exportar_global_streaming(leitor, mesh_entries, offset, export_name, scale=scale,
+                                         dados_entradas=dados_entradas, cache=cache, material=material,
+                                         solda=solda, normais=normais)
+    cena = montar_global(leitor, mesh_entries, offset, scale=scale, dados_entradas=dados_entradas, cache=cache)
+    if solda is not None:
+        cena.soldar(solda)
+    if not len(cena.faces):
+        alvo = "visualização" if opcao == "4" else "exportação"
+        print(Fore.RED + f"{nome_saida}: nenhuma face ativa encontrada para {alvo}.")
+        return False
+    if opcao == "4":
+        visualizar_global(cena, previa=previa)
+        return True
+    if visualizar:
+        visualizar_global(cena, export_name, material=material, formato=formato, previa=previa,
+                          normais=normais)
+        ok = True
+    else:
+        ok = exportar_global(cena, export_name, normais=normais, material=material, formato=formato)
+    base, extensao = os.path.splitext(export_name)
+    for nivel, tamanho_celula in enumerate(lods or (), start=1):
+        ok = exportar_global(cena.simplificar(tamanho_celula), f"{base}_lod{nivel}{extensao}",
+                             normais=normais, material=material, formato=formato) and ok
+    return ok
+
+# ---------------------------
+# Relatório (inventário) dos grupos e mesh entries de um pack
+# ---------------------------
+COLUNAS_RELATORIO = ['arquivo', 'verifica_group', 'verifica_pck', 'grupo', 'nome', 'endereco',
+                     'verifica_grupo', 'group_amount', 'group_pointer', 'mesh_entry', 'mesh_start',
+                     'mesh_size', 'mesh_end', 'mesh_vtx_total', 'strips_padrao1', 'strips_padrao2',
+                     'vertices_declarados', 'vertices', 'faces']
+
+def relatorio_mesh_entry(entrada, decodificar=False):
+    contagens, vertices_declarados = entrada.contar_tags()
+    item = {'mesh_entry': entrada.indice, 'mesh_start': entrada.mesh_start, 'mesh_size': entrada.mesh_size,
+            'mesh_end': entrada.mesh_end, 'mesh_vtx_total': entrada.mesh_vtx_total,
+            'strips_padrao1': contagens['vertices1_groups'], 'strips_padrao2': contagens['vertices2_groups'],
+            'vertices_declarados': vertices_declarados}
+    if decodificar:
+        strips = entrada.strips
+        item['vertices'] = sum(len(strip.vertices) for strip in strips)
+        item['faces'] = sum(len(strip.faces()) for strip in strips)
+        entrada.liberar()
+    return item
+
+def relatorio_pack(pack, grupos=None, decodificar=False):
+    # Dicionário serializável em JSON; por padrão só lê as tabelas e varre as
+    # tags VIF, sem decodificar vértices (`decodificar` acrescenta as contagens
+    # de vértices e faces ativas)
+    relatorio = {'arquivo': pack.leitor.caminho, 'tamanho': pack.leitor.tamanho, 'offset': pack.offset,
+                 'pointer_to_grouplist': pack.pointer_to_grouplist, 'verifica_group': pack.verifica_group,
+                 'pointer_to_pck_list': pack.pointer_to_pck_list, 'verifica_pck': pack.verifica_pck,
+                 'grupos': []}
+    for grupo in pack.grupos if grupos is None else grupos:
+        entradas = [relatorio_mesh_entry(e, decodificar) for e in grupo.entradas]
+        totais = {chave: sum(e[chave] for e in entradas)
+                  for chave in ('mesh_size', 'strips_padrao1', 'strips_padrao2', 'vertices_declarados',
+                                'vertices', 'faces')
+                  if decodificar or chave not in ('vertices', 'faces')}
+        relatorio['grupos'].append({'grupo': grupo.indice, 'nome': grupo.nome, 'endereco': grupo.endereco,
+                                    'verifica_grupo': grupo.verifica_grupo,
+                                    'group_amount': grupo.group_amount, 'group_pointer': grupo.group_pointer,
+                                    'totais': totais, 'mesh_entries': entradas})
+        grupo.liberar()
+    return relatorio
+
+def linhas_relatorio(relatorio):
+    # Uma linha por mesh entry (ou por grupo, se ele não tiver nenhuma)
+    pack = {chave: relatorio[chave] for chave in ('arquivo', 'verifica_group', 'verifica_pck')}
+    for grupo in relatorio['grupos']:
+        base = dict(pack, **{chave: grupo[chave] for chave in ('grupo', 'nome', 'endereco', 'verifica_grupo',
+                                                               'group_amount', 'group_pointer')})
+        for entrada in grupo['mesh_entries'] or [{}]:
+            yield dict(base, **entrada)
+
+def gravar_relatorio(relatorios, formato, destino):
+    if destino != "-":
+        os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    saida = sys.stdout if destino == "-" else open(destino, 'w', newline='')
+    try:
+        if formato == "csv":
+            escritor = csv.DictWriter(saida, COLUNAS_RELATORIO, extrasaction='ignore')
+            escritor.writeheader()
+            for relatorio in relatorios:
+                escritor.writerows(linhas_relatorio(relatorio))
+        else:
+            json.dump({'packs': relatorios}, saida, indent=2, ensure_ascii=False)
+            saida.write("\n")
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    if destino != "-":
+        print(Fore.GREEN + f"Relatório gravado em '{destino}'.")
+
+def processar_lote_arquivo(caminho, args, cache=None, relatorios=None, miniaturas=None):
+    with (abrir_pack_indexado(caminho, cache) if args.indice else Pack(caminho, cache=cache)) as pack:
+        grupos = [pack[i] for i in selecionar_grupos(args.grupos, pack.namelist_ascii, pack.por_nome)]
+        if args.listar:
+            print(Fore.CYAN + Style.BRIGHT + f"{caminho}:")
+            for grupo in grupos:
+                print(f"{grupo.indice}. {grupo.nome} - PCK_INDEX: 0x{grupo.endereco:08X}")
+            return True
+        if not grupos:
+            print(Fore.RED + f"{caminho}: nenhum grupo selecionado.")
+            return False
+        if relatorios is not None:
+            relatorios.append(relatorio_pack(pack, grupos, decodificar=args.relatorio_decodificar))
+            return True
+        diretorio = os.path.join(args.saida, sanitizar_nome(os.path.basename(caminho)))
+        os.makedirs(diretorio, exist_ok=True)
+        normais = False if args.sem_normais else ("vtk" if args.normais_vtk else True)
+        if args.processos == 1:
+            extraidos = ((grupo.endereco, grupo.mesh_entries, None) for grupo in grupos)
+        else:
+            pular = None
+            if args.incremental and args.opcao in ("2", "6") and miniaturas is None:
+                # Consulta os manifestos antes de mandar as mesh entries para o pool
+                scale = args.opcao == "6"
+                manifestos = [ManifestoExportacao(diretorio_individual(diretorio, grupo.nome_saida, scale),
+                                                  ManifestoExportacao.parametros_exportacao(
+                                                      scale, args.formato, normais,
+                                                      grupo.nome_saida if args.mtl else None, args.soldar))
+                              for grupo in grupos]
+                pular = lambda g_idx, me_idx, entry: manifestos[g_idx].inalterada(
+                    me_idx, ManifestoExportacao.hash_entrada(pack.leitor, entry))
+            extraidos = extrair_paralelo(pack.leitor, pack.offset, [grupo.endereco for grupo in grupos],
+                                         args.processos, cache=cache, pular=pular)
+        ok = True
+        for grupo, (_, mesh_entries, dados) in zip(grupos, extraidos):
+            nome_saida = grupo.nome_saida
+            if miniaturas is not None:
+                cena = montar_global(pack.leitor, mesh_entries, pack.offset, dados_entradas=dados, cache=cache)
+                ok = miniaturas.renderizar(cena, os.path.join(diretorio, "miniaturas"), nome_saida) and ok
+                continue
+            ok = exportar_grupo_lote(pack.leitor, pack.offset, nome_saida, args.opcao, diretorio,
+                                     mesh_entries, dados_entradas=dados, visualizar=args.visualizar,
+                                     normais=normais,
+                                     material=nome_saida if args.mtl else None, cache=cache,
+                                     streaming=args.streaming, formato=args.formato,
+                                     solda=args.soldar, escritores=args.escritores,
+                                     incremental=args.incremental, lods=args.lod, previa=args.previa) and ok
+        return ok
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Extrai meshes de packs do Midnight Club 3 (PS2). "
+                    "Sem argumentos, abre o menu interativo.")
+    parser.add_argument("entradas", nargs="+",
+                        help="arquivos, diretórios ou padrões glob (ex.: 'packs/*.dat')")
+    parser.add_argument("-g", "--grupos", nargs="+", metavar="SELETOR",
+                        help="grupos a exportar: all (padrão), número, intervalo 3-7, "
+                             "nome exato ou re:<regex>")
+    parser.add_argument("-o", "--opcao", choices=["1", "2", "4", "5", "6"], default="1",
+                        help="modo de saída, igual ao menu: 1 global, 2 individual, 4 só visualizar "
+                             "(sem gravar arquivos), 5 global /256, 6 individual /256 (padrão: 1)")
+    parser.add_argument("-d", "--saida", default=".",
+                        help="diretório de saída (um subdiretório por pack)")
+    parser.add_argument("-r", "--recursivo", action="store_true",
+                        help="percorre diretórios e padrões ** recursivamente")
+    parser.add_argument("-l", "--listar", action="store_true",
+                        help="apenas lista os grupos selecionados, sem exportar")
+    parser.add_argument("--indice", action="store_true",
+                        help="usa (e cria na primeira vez) um índice <pack>.mc3idx.json com nomes, "
+                             "grupos e mesh entries; buscas por nome não releem as tabelas do pack")
+    parser.add_argument("--relatorio", choices=["json", "csv"],
+                        help="em vez de exportar, grava um inventário dos grupos selecionados: "
+                             "verificações de assinatura, group_amount, mesh entries e strips por "
+                             "padrão (só varre as tags, sem decodificar vértices)")
+    parser.add_argument("--relatorio-saida", metavar="ARQUIVO",
+                        help="destino do relatório ('-' = saída padrão; padrão: "
+                             "<saida>/relatorio.json ou .csv)")
+    parser.add_argument("--relatorio-decodificar", action="store_true",
+                        help="decodifica as mesh entries para incluir vértices e faces ativas no relatório")
+    parser.add_argument("-j", "--processos", type=int, default=1, metavar="N",
+                        help="processos para decodificar grupos e mesh entries em paralelo "
+                             "(0 = todos os núcleos; padrão: 1)")
+    parser.add_argument("-w", "--escritores", type=int, default=1, metavar="N",
+                        help="opções 2/6: threads gravando os arquivos enquanto as próximas mesh "
+                             "entries são decodificadas (padrão: 1, grava na hora)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="opções 2/6: guarda um manifesto com o hash de cada mesh entry e só "
+                             "refaz as que mudaram, removendo arquivos obsoletos")
+    parser.add_argument("--lod", nargs="+", type=float, metavar="CELULA",
+                        help="opções 1/5: grava também versões decimadas em grade (<nome>_lod1, "
+                             "_lod2, ...), uma por tamanho de célula, nas unidades dos vértices "
+                             "(ignorado com --streaming)")
+    parser.add_argument("--previa", type=float, metavar="CELULA",
+                        help="com -o 4, --visualizar ou --miniaturas, mostra a cena decimada com esse "
+                             "tamanho de célula (o arquivo exportado continua completo)")
+    parser.add_argument("--miniaturas", choices=["grupo", "entrada"],
+                        help="em vez de exportar, renderiza fora da tela um PNG por grupo (ou por "
+                             "mesh entry) em <saida>/<pack>/miniaturas, com as cores da visualização; "
+                             "um único renderizador é reaproveitado para todos os packs")
+    parser.add_argument("--miniatura-tamanho", type=int, default=256, metavar="PX",
+                        help="lado das miniaturas em pixels (padrão: 256)")
+    parser.add_argument("--miniatura-camera", nargs="+", choices=list(CAMERAS_MINIATURA), default=["iso"],
+                        help="posições de câmera; com mais de uma, grava <nome>_<camera>.png para cada "
+                             "(padrão: iso)")
+    parser.add_argument("-f", "--formato", choices=FORMATOS_EXPORTACAO, default="obj",
+                        help="formato de saída: obj (texto), glb (glTF binário, um nó por mesh "
+                             "entry) ou ply (binário little-endian) (padrão: obj)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="opções 1/5 com OBJ: grava o OBJ global uma mesh entry por vez, com "
+                             "memória limitada pela maior mesh entry (ignorado com --normais-vtk)")
+    parser.add_argument("--soldar", nargs="?", type=float, const=0.0, metavar="PASSO",
+                        help="funde vértices repetidos (mesma posição e UV) dentro de cada mesh entry "
+                             "e remove triângulos degenerados; com PASSO, compara as coordenadas "
+                             "quantizadas nesse passo")
+    parser.add_argument("--sem-normais", action="store_true",
+                        help="não grava normais")
+    parser.add_argument("--normais-vtk", action="store_true",
+                        help="calcula as normais com o VTK, orientando as faces automaticamente "
+                             "(padrão: normais NumPy ponderadas por área, sem carregar o VTK)")
+    parser.add_argument("--mtl", action="store_true",
+                        help="grava um .mtl ao lado de cada OBJ (material com o nome do grupo)")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="diretório de cache dos dados decodificados; re-exportações de "
+                             "packs inalterados pulam a decodificação")
+    parser.add_argument("--cache-limite", type=int, default=1024, metavar="MB",
+                        help="tamanho máximo do cache; as entradas menos usadas saem primeiro "
+                             "(padrão: 1024)")
+    parser.add_argument("--perfil", action="store_true",
+                        help="mede cada etapa (tempo, bytes, strips/vértices/faces) e imprime "
+                             "uma tabela no fim; com -j, a decodificação nos workers não é medida")
+    parser.add_argument("--perfil-memoria", action="store_true",
+                        help="inclui o pico de memória por etapa (tracemalloc; deixa a execução mais lenta)")
+    parser.add_argument("--perfil-json", metavar="ARQUIVO", help="grava o perfil (resumo e eventos) em JSON")
+    parser.add_argument("--perfil-trace", metavar="ARQUIVO",
+                        help="grava o perfil no formato Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument("--visualizar", action="store_true",
+                        help="abre a janela 3D para cada grupo global antes de exportar")
+    return parser
+
+def executar_lote(arquivos, args, cache=None, relatorios=None, miniaturas=None):
+    falhas = 0
+    for caminho in arquivos:
+        try:
+            if not processar_lote_arquivo(caminho, args, cache, relatorios, miniaturas):
+                falhas += 1
+        except SystemExit:
+            # As etapas processar_* encerram com sys.exit em arquivos inválidos;
+            # no modo em lote o erro já foi impresso e seguimos para o próximo arquivo.
+            print(Fore.RED + f"Falha ao processar '{caminho}'.")
+            falhas += 1
+        except (OSError, ValueError) as e:
+            print(Fore.RED + f"Erro ao abrir ou processar o arquivo '{caminho}': {e}")
+            falhas += 1
+    return falhas
+
+def main_lote(argv):
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    try:
+        args.grupos = compilar_seletores(args.grupos) or None
+    except re.error as e:
+        parser.error(f"regex inválido em --grupos: {e}")
+    arquivos = expandir_entradas(args.entradas, args.recursivo)
+    if not arquivos:
+        print(Fore.RED + "Nenhum arquivo encontrado.")
+        return 1
+    cache = CacheMalhas(args.cache, args.cache_limite << 20) if args.cache else None
+    relatorios = [] if args.relatorio else None
+    miniaturas = (RenderizadorMiniaturas(args.miniatura_tamanho, args.miniatura_camera,
+                                         por_entrada=args.miniaturas == "entrada", previa=args.previa)
+                  if args.miniaturas and not args.relatorio else None)
+    try:
+        if args.perfil or args.perfil_json or args.perfil_trace or args.perfil_memoria:
+            with Instrumentacao(memoria=args.perfil_memoria) as perfil:
+                falhas = executar_lote(arquivos, args, cache, relatorios, miniaturas)
+            perfil.imprimir_resumo()
+            if args.perfil_json:
+                perfil.gravar_json(args.perfil_json)
+            if args.perfil_trace:
+                perfil.gravar_chrome_trace(args.perfil_trace)
+        else:
+            falhas = executar_lote(arquivos, args, cache, relatorios, miniaturas)
+    finally:
+        if miniaturas is not None:
+            miniaturas.fechar()
+    if miniaturas is not None:
+        print(Fore.GREEN + f"{miniaturas.geradas} miniatura(s) gravada(s).")
+    if relatorios is not None:
+        destino = args.relatorio_saida or os.path.join(args.saida, f"relatorio.{args.relatorio}")
+        gravar_relatorio(relatorios, args.relatorio, destino)
+    if falhas:
+        print(Fore.RED + f"{falhas} de {len(arquivos)} arquivo(s) com falha.")
+    return 1 if falhas else 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main_lote(sys.argv[1:]))
     main()